@@ -0,0 +1,31 @@
+from functools import lru_cache
+
+from otteroad import (
+    KafkaConsumerService,
+    KafkaConsumerSettings,
+    KafkaProducerClient,
+    KafkaProducerSettings,
+)
+
+
+@lru_cache
+def get_consumer() -> KafkaConsumerService:
+    """
+    Function returns process-wide Kafka consumer service, created on first call
+    Returns:
+        KafkaConsumerService: consumer service configured from env
+    """
+
+    return KafkaConsumerService(KafkaConsumerSettings.from_env())
+
+
+@lru_cache
+def get_producer() -> KafkaProducerClient:
+    """
+    Function returns process-wide Kafka producer client, created on first call.
+    Event loop is not bound on creation, call init_loop() inside running loop before start.
+    Returns:
+        KafkaProducerClient: producer client configured from env
+    """
+
+    return KafkaProducerClient(KafkaProducerSettings.from_env(), init_loop=False)
@@ -1,12 +1,9 @@
-from otteroad import KafkaProducerClient, KafkaProducerSettings
+from .clients import get_producer
 
 
 class ProducerWrapper:
     def __init__(self):
-        self.producer_settings = KafkaProducerSettings.from_env()
-        self.producer_service = KafkaProducerClient(
-            self.producer_settings, init_loop=False
-        )
+        self.producer_service = get_producer()
 
     async def start(self):
         self.producer_service.init_loop()
@@ -126,7 +126,7 @@ class APIHandler:
         endpoint_url: str,
         headers: dict | None = None,
         params: dict | None = None,
-        data: dict | None = None,
+        data: dict | list | None = None,
         session: aiohttp.ClientSession | None = None,
     ) -> dict | list:
         """Function to post data from api
@@ -135,7 +135,7 @@ class APIHandler:
             endpoint_url (str): Endpoint url
             headers (dict | None): Headers
             params (dict | None): Query parameters
-            data (dict | None): Request data
+            data (dict | list | None): Request data
             session (aiohttp.ClientSession | None): Session to use
         Returns:
             dict | list: Response data as python object
@@ -164,6 +164,7 @@ class APIHandler:
                     endpoint_url=endpoint_url,
                     headers=headers,
                     params=params,
+                    data=data,
                     session=session,
                 )
             return result
@@ -173,7 +174,7 @@ class APIHandler:
         endpoint_url: str,
         headers: dict | None = None,
         params: dict | None = None,
-        data: dict | None = None,
+        data: dict | list | None = None,
         session: aiohttp.ClientSession | None = None,
     ) -> dict | list:
         """Function to post data from api
@@ -182,7 +183,7 @@ class APIHandler:
             endpoint_url (str): Endpoint url
             headers (dict | None): Headers
             params (dict | None): Query parameters
-            data (dict | None): Request data
+            data (dict | list | None): Request data
             session (aiohttp.ClientSession | None): Session to use
         Returns:
             dict | list: Response data as python object
@@ -211,6 +212,7 @@ class APIHandler:
                     endpoint_url=endpoint_url,
                     headers=headers,
                     params=params,
+                    data=data,
                     session=session,
                 )
             return result
@@ -220,7 +222,7 @@ class APIHandler:
         endpoint_url: str,
         headers: dict | None = None,
         params: dict | None = None,
-        data: dict | None = None,
+        data: dict | list | None = None,
         session: aiohttp.ClientSession | None = None,
     ) -> dict | list:
         """Function to post data from api
@@ -229,7 +231,7 @@ class APIHandler:
             endpoint_url (str): Endpoint url
             headers (dict | None): Headers
             params (dict | None): Query parameters
-            data (dict | None): Request data
+            data (dict | list | None): Request data
             session (aiohttp.ClientSession | None): Session to use
         Returns:
             dict | list: Response data as python object
@@ -0,0 +1,78 @@
+import time
+
+from app.common.exceptions.http_exception_wrapper import http_exception
+
+
+class CircuitBreaker:
+    """
+    Class for failing fast on upstream API which keeps failing.
+    After fail_max consecutive failures requests are rejected for reset_timeout seconds, then the circuit is
+    half-open: a single trial request is let through, others are rejected until its result either closes the circuit
+    or opens it again. Trial which isn't recorded within reset_timeout (e.g. cancelled) is replaced by a new one.
+    """
+
+    def __init__(self, name: str, fail_max: int = 10, reset_timeout: float = 30):
+        """
+        Initialisation function
+        Args:
+            name (str): protected API name for error messages
+            fail_max (int): number of consecutive failures to open the circuit
+            reset_timeout (float): seconds to reject requests for after the circuit opens
+        Returns:
+            None
+        """
+
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: float | None = None
+        self._trial_started_at: float | None = None
+
+    def check(self) -> None:
+        """
+        Function checks whether request can be sent
+        Returns:
+            None
+        Raises:
+            503, if the circuit is open
+        """
+
+        if self._opened_at is None:
+            return
+        now = time.monotonic()
+        if now - self._opened_at >= self.reset_timeout and (
+            self._trial_started_at is None
+            or now - self._trial_started_at >= self.reset_timeout
+        ):
+            self._trial_started_at = now
+            return
+        raise http_exception(
+            503,
+            f"{self.name} is unavailable, requests are paused after repeated failures",
+            _input={"fail_max": self.fail_max},
+            _detail={"retry_after": self.reset_timeout},
+        )
+
+    def record_success(self) -> None:
+        """
+        Function closes the circuit after successful request
+        Returns:
+            None
+        """
+
+        self._failures = 0
+        self._opened_at = None
+        self._trial_started_at = None
+
+    def record_failure(self) -> None:
+        """
+        Function counts failed request and opens the circuit after fail_max consecutive failures or failed trial
+        Returns:
+            None
+        """
+
+        self._failures += 1
+        if self._failures >= self.fail_max or self._trial_started_at is not None:
+            self._opened_at = time.monotonic()
+            self._trial_started_at = None
@@ -1,7 +1,5 @@
 import asyncio
 
-import numpy as np
-
 from app.common.gateways.urban_api_gateway import UrbanAPIGateway
 
 
@@ -10,7 +8,7 @@ class TerritoryChecker:
     This class is aimed to check territory statuses for.
     Attributes:
         urban_api_gateway (UrbanAPIGateway): API Gateway for Urban API requests
-        federal_cities (np.ndarray): numpy array of federal cities ids (as int) from Urban API. None on init.
+        federal_cities (frozenset[int]): federal cities ids from Urban API. None on init.
     """
 
     def __init__(self, urban_api_gateway: UrbanAPIGateway):
@@ -21,7 +19,7 @@ class TerritoryChecker:
         """
 
         self.urban_api_gateway: UrbanAPIGateway = urban_api_gateway
-        self.federal_cities: np.ndarray | None = None
+        self.federal_cities: frozenset[int] | None = None
 
     async def check_on_federal_city(self, territory_id: int) -> bool:
         """
@@ -32,7 +30,7 @@ class TerritoryChecker:
             bool: True if territory is a federal city else False
         """
 
-        if not self.federal_cities:
+        if self.federal_cities is None:
             countries_ids = await self.urban_api_gateway.get_countries_ids()
             results = await asyncio.gather(
                 *(
@@ -40,6 +38,8 @@ class TerritoryChecker:
                     for country_id in countries_ids
                 )
             )
-            self.federal_cities = np.concatenate([np.array(r) for r in results])
+            self.federal_cities = frozenset(
+                city_id for cities in results for city_id in cities
+            )
 
         return territory_id in self.federal_cities
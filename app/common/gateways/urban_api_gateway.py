@@ -1,10 +1,17 @@
 import asyncio
+import random
+import time
 from http.client import responses
 
+import aiohttp
 import geopandas as gpd
 import pandas as pd
+from cachetools import TTLCache
+from fastapi import HTTPException
+from loguru import logger
 
 from app.common.api_handler.api_handler import APIHandler
+from app.common.api_handler.circuit_breaker import CircuitBreaker
 from app.common.exceptions.http_exception_wrapper import http_exception
 
 
@@ -16,20 +23,86 @@ class UrbanAPIGateway:
         api_handler (APIHandler): An instance of APIHandler to handle API requests.
     """
 
-    def __init__(self, api_handler: APIHandler):
+    def __init__(
+        self,
+        api_handler: APIHandler,
+        scenarios_projects_cache_size: int = 4096,
+        fed_city_mo_ttl: float = 3600,
+        projects_territories_cache_size: int = 1024,
+        projects_territories_ttl: float = 300,
+        indicators_put_attempts: int = 4,
+        indicators_put_max_backoff: float = 2,
+        bulk_indicators_upload: bool = False,
+    ):
         """
         Initializes the UrbanAPIGateway with an APIHandler instance.
         Args:
             api_handler (APIHandler): An instance of APIHandler to handle API requests.
+            scenarios_projects_cache_size (int): Max number of cached scenario to project ids pairs.
+            fed_city_mo_ttl (float): Federal cities municipalities cache time to live in seconds.
+            projects_territories_cache_size (int): Max number of cached projects territories.
+            projects_territories_ttl (float): Projects territories cache time to live in seconds.
+            indicators_put_attempts (int): Max attempts to upload indicator value on transient errors.
+            indicators_put_max_backoff (float): Max delay between indicator value upload attempts in seconds.
+            bulk_indicators_upload (bool): Whether to upload scenario indicators values in one request to bulk
+                endpoint. Falls back to per value upload if Urban API doesn't support the bulk endpoint.
         """
 
         self.api_handler = api_handler
+        self.scenarios_projects_cache_size = scenarios_projects_cache_size
+        self._scenarios_projects: dict[int, int] = {}
+        self.fed_city_mo_ttl = fed_city_mo_ttl
+        self._fed_city_mo: dict[int, tuple[float, gpd.GeoDataFrame]] = {}
+        # keyed with token as well, so private projects are not shared between users
+        self._projects_territories: TTLCache = TTLCache(
+            maxsize=projects_territories_cache_size, ttl=projects_territories_ttl
+        )
+        self.indicators_put_attempts = indicators_put_attempts
+        self.indicators_put_max_backoff = indicators_put_max_backoff
+        self.indicators_breaker = CircuitBreaker("Urban API indicators upload")
+        self.bulk_indicators_upload = bulk_indicators_upload
+        # set once Urban API shows bulk endpoint is not supported, bulk_indicators_upload config is kept as is
+        self._bulk_indicators_unsupported = False
+
+    def invalidate_fed_city_mo(self, federal_city_id: int | None = None) -> None:
+        """
+        Function drops cached federal city municipalities
+        Args:
+            federal_city_id (int | None): The ID of the federal city. Drops all cached cities if None.
+        Returns:
+            None
+        """
+
+        if federal_city_id is None:
+            self._fed_city_mo.clear()
+        else:
+            self._fed_city_mo.pop(federal_city_id, None)
 
     async def get_mo_for_fed_city_with_population(
         self, federal_city_id: int
     ) -> gpd.GeoDataFrame | pd.DataFrame:
         """
-        Function retrieves territories for a given federal city by its ID.
+        Function retrieves territories for a given federal city by its ID. Result is cached for fed_city_mo_ttl.
+        Args:
+            federal_city_id (int): The ID of the federal city.
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame containing the territories of the federal city in 4326 crs.
+        Raises:
+            Any HTTP from Urban API.
+        """
+
+        cached = self._fed_city_mo.get(federal_city_id)
+        if cached and time.monotonic() - cached[0] < self.fed_city_mo_ttl:
+            return cached[1].copy()
+        res_gdf = await self._retrieve_mo_for_fed_city_with_population(federal_city_id)
+        self._fed_city_mo[federal_city_id] = (time.monotonic(), res_gdf)
+        return res_gdf.copy()
+
+    async def _retrieve_mo_for_fed_city_with_population(
+        self, federal_city_id: int
+    ) -> gpd.GeoDataFrame | pd.DataFrame:
+        """
+        Function retrieves territories for a given federal city by its ID from Urban API.
         Args:
             federal_city_id (int): The ID of the federal city.
         Returns:
@@ -80,34 +153,313 @@ class UrbanAPIGateway:
         return resp[0]["indicators"][0]["value"]
 
     async def get_project_id_by_scenario_id(
-        self, scenario_id: int, token: str | None = None
+        self,
+        scenario_id: int,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
     ) -> int:
         """
-        Function retrieves project id by scenario id by its ID.
+        Function retrieves project id by scenario id by its ID. Scenario never changes its project, so resolved ids
+        are kept in memory and repeated calls skip Urban API request.
         Args:
             scenario_id (int): The ID of the scenario.
             token (str | None): The API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
         Returns:
             int: The project id.
         Raises:
             Any HTTP from Urban API.
         """
 
+        if scenario_id in self._scenarios_projects:
+            return self._scenarios_projects[scenario_id]
+        resp = await self.get_scenario_info(scenario_id, token, session=session)
+        project_id = (resp or {}).get("project", {}).get("project_id")
+        if project_id is None:
+            raise http_exception(
+                404,
+                "No project data found",
+                _input={
+                    "token": token,
+                    "scenario_id": scenario_id,
+                },
+                _detail={},
+            )
+        if len(self._scenarios_projects) >= self.scenarios_projects_cache_size:
+            self._scenarios_projects.pop(next(iter(self._scenarios_projects)))
+        self._scenarios_projects[scenario_id] = project_id
+        return project_id
+
+    async def get_scenario_info(
+        self,
+        scenario_id: int,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+    ) -> dict:
+        """
+        Function retrieves scenario info by its ID.
+        Args:
+            scenario_id (int): The ID of the scenario.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+        Returns:
+            dict: The scenario info.
+        Raises:
+            Any HTTP from Urban API.
+        """
+
         headers = {"Authorization": f"Bearer {token}"} if token else None
-        resp = await self.api_handler.get(
-            f"/api/v1/scenarios/{scenario_id}", headers=headers
+        return await self.api_handler.get(
+            f"/api/v1/scenarios/{scenario_id}", headers=headers, session=session
         )
-        if resp:
-            return resp["project_id"]["project_id"]
-        raise http_exception(
-            404,
-            "No project data found",
-            _input={
-                "token": token,
-                "scenario_id": scenario_id,
-            },
-            _detail={},
+
+    async def get_project_territory(
+        self,
+        project_id: int,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+        use_cache: bool = True,
+    ) -> dict:
+        """
+        Function retrieves project territory by project ID. Result is cached for projects_territories_ttl.
+        Args:
+            project_id (int): The ID of the project.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+            use_cache (bool): Whether cached territory can be returned. Defaults to True, with False territory is
+            requested from Urban API and the cache is refreshed.
+        Returns:
+            dict: The project territory with geometry in 4326 crs. Shared with cache, should not be modified.
+        Raises:
+            Any HTTP from Urban API.
+        """
+
+        cache_key = (project_id, token)
+        territory = self._projects_territories.get(cache_key) if use_cache else None
+        if territory is None:
+            headers = {"Authorization": f"Bearer {token}"} if token else None
+            territory = await self.api_handler.get(
+                f"/api/v1/projects/{project_id}/territory",
+                headers=headers,
+                session=session,
+            )
+            self._projects_territories[cache_key] = territory
+        return territory
+
+    async def get_scenario_territory(
+        self,
+        scenario_id: int,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+        use_cache: bool = True,
+    ) -> dict:
+        """
+        Function retrieves project territory for a given scenario by its ID. Scenario info request is skipped when
+        scenario project id is already known.
+        Args:
+            scenario_id (int): The ID of the scenario.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+            use_cache (bool): Whether cached project territory can be returned. Defaults to True.
+        Returns:
+            dict: The project territory with geometry in 4326 crs.
+        Raises:
+            Any HTTP from Urban API.
+        """
+
+        project_id = await self.get_project_id_by_scenario_id(
+            scenario_id, token, session=session
+        )
+        return await self.get_project_territory(
+            project_id, token, session=session, use_cache=use_cache
+        )
+
+    async def put_scenario_indicator_value(
+        self,
+        scenario_id: int,
+        indicator_data: dict,
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+    ) -> dict:
+        """
+        Function uploads indicator value for a given scenario. Connection errors and 5xx responses are retried with
+        jittered exponential backoff, upload is rejected right away while indicators circuit breaker is open.
+        PUT is idempotent, so retried request can't duplicate the value.
+        Args:
+            scenario_id (int): The ID of the scenario.
+            indicator_data (dict): Indicator value body.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+        Returns:
+            dict: The saved indicator value.
+        Raises:
+            503, if indicators circuit breaker is open.
+            Any HTTP from Urban API.
+        """
+
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        for attempt in range(1, self.indicators_put_attempts + 1):
+            self.indicators_breaker.check()
+            try:
+                result = await self.api_handler.put(
+                    f"/api/v1/scenarios/{scenario_id}/indicators_values",
+                    headers=headers,
+                    data=indicator_data,
+                    session=session,
+                )
+            except (aiohttp.ClientError, asyncio.TimeoutError, HTTPException) as e:
+                status = (
+                    e.status
+                    if isinstance(e, aiohttp.ClientResponseError)
+                    else getattr(e, "status_code", 500)
+                )
+                if status < 500:
+                    # Urban API has responded, so it's available, client errors are not retried
+                    self.indicators_breaker.record_success()
+                    raise
+                self.indicators_breaker.record_failure()
+                if attempt == self.indicators_put_attempts:
+                    raise
+                logger.warning(
+                    f"Indicator upload for scenario {scenario_id} failed on attempt {attempt}: {repr(e)}"
+                )
+                await asyncio.sleep(
+                    random.uniform(
+                        0, min(self.indicators_put_max_backoff, 0.1 * 2**attempt)
+                    )
+                )
+            else:
+                self.indicators_breaker.record_success()
+                return result
+
+    async def put_scenario_indicators_values(
+        self,
+        scenario_id: int,
+        indicators_data: list[dict],
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+    ) -> list[dict]:
+        """
+        Function uploads several indicator values for a given scenario. With bulk_indicators_upload values are sent in
+        one request, otherwise (or if Urban API doesn't accept the batch) they are uploaded concurrently one by one.
+        Args:
+            scenario_id (int): The ID of the scenario.
+            indicators_data (list[dict]): Indicator values bodies.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+        Returns:
+            list[dict]: The saved indicator values.
+        Raises:
+            500, if any of indicator values failed to upload.
+        """
+
+        if (
+            self.bulk_indicators_upload
+            and not self._bulk_indicators_unsupported
+            and indicators_data
+        ):
+            try:
+                return await self._post_scenario_indicators_values_bulk(
+                    scenario_id, indicators_data, token, session=session
+                )
+            except (HTTPException, aiohttp.ContentTypeError) as e:
+                if not self._is_bulk_unsupported_error(e):
+                    raise
+                logger.warning(
+                    f"Urban API doesn't support bulk indicators upload: {repr(e)}, falling back to per value upload"
+                )
+                self._bulk_indicators_unsupported = True
+        results = await asyncio.gather(
+            *[
+                self.put_scenario_indicator_value(
+                    scenario_id, indicator_data, token, session=session
+                )
+                for indicator_data in indicators_data
+            ],
+            return_exceptions=True,
         )
+        errors = [i for i in results if isinstance(i, BaseException)]
+        if errors:
+            for error in errors:
+                logger.error(
+                    f"Failed to upload indicator for scenario {scenario_id}: {repr(error)}"
+                )
+            raise http_exception(
+                500,
+                f"Failed to upload {len(errors)} of {len(results)} indicators values",
+                _input={"scenario_id": scenario_id},
+                _detail={"errors": [repr(error) for error in errors]},
+            )
+        return results
+
+    @staticmethod
+    def _is_bulk_unsupported_error(e: HTTPException | aiohttp.ContentTypeError) -> bool:
+        """
+        Function checks whether Urban API error shows that bulk indicators endpoint doesn't accept values array:
+        405 or 422 about the whole request body type. Errors about particular scenario or values are not.
+        Args:
+            e (HTTPException | aiohttp.ContentTypeError): Urban API error
+        Returns:
+            bool: True if bulk endpoint is not supported
+        """
+
+        if isinstance(e, aiohttp.ContentTypeError):
+            return e.status == 405
+        if e.status_code == 405:
+            return True
+        if e.status_code != 422 or not isinstance(e.detail, dict):
+            return False
+        response = e.detail.get("detail")
+        errors = response.get("detail") if isinstance(response, dict) else None
+        return isinstance(errors, list) and any(
+            isinstance(error, dict) and list(error.get("loc", [])) == ["body"]
+            for error in errors
+        )
+
+    async def _post_scenario_indicators_values_bulk(
+        self,
+        scenario_id: int,
+        indicators_data: list[dict],
+        token: str | None = None,
+        session: aiohttp.ClientSession | None = None,
+    ) -> list[dict]:
+        """
+        Function uploads several indicator values for a given scenario in one request to bulk endpoint.
+        Args:
+            scenario_id (int): The ID of the scenario.
+            indicators_data (list[dict]): Indicator values bodies.
+            token (str | None): The user private API token. Defaults to None.
+            session (aiohttp.ClientSession | None): Session to reuse. Defaults to None.
+        Returns:
+            list[dict]: The saved indicator values.
+        Raises:
+            503, if indicators circuit breaker is open.
+            Any HTTP from Urban API.
+        """
+
+        self.indicators_breaker.check()
+        headers = {"Authorization": f"Bearer {token}"} if token else None
+        try:
+            result = await self.api_handler.post(
+                f"/api/v1/scenarios/{scenario_id}/indicators_values/bulk",
+                headers=headers,
+                data=indicators_data,
+                session=session,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError, HTTPException) as e:
+            status = (
+                e.status
+                if isinstance(e, aiohttp.ContentTypeError)
+                else getattr(e, "status_code", 500)
+            )
+            if status >= 500:
+                self.indicators_breaker.record_failure()
+            else:
+                # Urban API has responded, so it's available
+                self.indicators_breaker.record_success()
+            raise
+        self.indicators_breaker.record_success()
+        return result
 
     async def get_project_info(
         self,
@@ -180,41 +532,6 @@ class UrbanAPIGateway:
         )
         return gpd.GeoDataFrame.from_features(resp, crs=4326)
 
-    async def get_subterritories_ids_for_ter_ids(
-        self,
-        territories_ids: list[int],
-        get_all_levels: bool = False,
-        cities_only: bool = False,
-    ) -> list[int]:
-        """
-        Function retrieves subterritories IDs for a given list of territory IDs.
-        Args:
-            territories_ids (list[int]): The IDs of the territories.
-            get_all_levels (bool): Whether to get all levels of subterritories. Defaults to False.
-            cities_only (bool): Whether to return only cities. Defaults to False.
-        Returns:
-            list[int]: A list of subterritories IDs.
-        Raises:
-            Any HTTP from Urban API.
-        """
-
-        tasks = [
-            self.api_handler.get(
-                "/api/v1/all_territories_without_geometry",
-                params={
-                    "parent_id": ter_id,
-                    "get_all_levels": get_all_levels,
-                    "cities_only": cities_only,
-                },
-            )
-            for ter_id in territories_ids
-        ]
-        territories = await asyncio.gather(*tasks)
-        res = []
-        for i in territories:
-            res += [ter["territory_id"] for ter in i]
-        return res
-
     async def get_territory_hexagons(self, territory_id: int) -> gpd.GeoDataFrame:
         """
         Function retrieves territory hexagons geometries for a given territory ID.
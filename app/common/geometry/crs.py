@@ -0,0 +1,90 @@
+from functools import lru_cache
+
+import geopandas as gpd
+import numpy as np
+import orjson
+import shapely
+from pyproj import CRS, Transformer
+
+
+def ensure_wgs84(gdf: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+    """
+    Function reprojects GeoDataFrame to 4326 crs only if it is not in 4326 already
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame to reproject
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame in 4326 crs (the same object if no transform is required)
+    """
+
+    if gdf.crs is not None and gdf.crs.equals(4326):
+        return gdf
+    return gdf.to_crs(4326)
+
+
+@lru_cache(maxsize=32)
+def get_transformer(from_crs: CRS | int | str, to_crs: CRS | int | str) -> Transformer:
+    """
+    Function returns cached transformer between two crs, so it is not rebuilt on every reprojection
+    Args:
+        from_crs (CRS | int | str): source crs
+        to_crs (CRS | int | str): target crs
+    Returns:
+        Transformer: pyproj transformer with x, y axis order
+    """
+
+    return Transformer.from_crs(from_crs, to_crs, always_xy=True)
+
+
+def reproject_geometry(
+    geometry: shapely.Geometry | np.ndarray,
+    from_crs: CRS | int | str,
+    to_crs: CRS | int | str,
+) -> shapely.Geometry | np.ndarray:
+    """
+    Function reprojects shapely geometry or geometries array with cached transformer. Z coordinates are kept and
+    transformed for geometries having them, as GeoSeries.to_crs does
+    Args:
+        geometry (shapely.Geometry | np.ndarray): geometry or array of geometries to reproject
+        from_crs (CRS | int | str): source crs
+        to_crs (CRS | int | str): target crs
+    Returns:
+        shapely.Geometry | np.ndarray: reprojected geometry or array of geometries
+    """
+
+    transformer = get_transformer(from_crs, to_crs)
+    # include_z=None infers dimensionality per geometry, coords are (n, 2) or (n, 3)
+    return shapely.transform(
+        geometry,
+        lambda coords: np.column_stack(transformer.transform(*coords.T)),
+        include_z=None,
+    )
+
+
+def reproject(gdf: gpd.GeoDataFrame, crs: CRS | int | str) -> gpd.GeoDataFrame:
+    """
+    Function reprojects GeoDataFrame geometry with cached transformer
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame with set crs
+        crs (CRS | int | str): target crs
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame in target crs
+    """
+
+    geometry = reproject_geometry(np.asarray(gdf.geometry.values), gdf.crs, crs)
+    return gdf.set_geometry(gpd.GeoSeries(geometry, index=gdf.index, crs=crs))
+
+
+def geometry_gdf(geometry: dict, crs: CRS | int | str = 4326) -> gpd.GeoDataFrame:
+    """
+    Function builds one row GeoDataFrame from GeoJSON geometry in 4326 crs
+    Args:
+        geometry (dict): GeoJSON geometry in 4326 crs, e.g. project territory geometry from Urban API
+        crs (CRS | int | str): crs of resulting GeoDataFrame. Defaults to 4326.
+    Returns:
+        gpd.GeoDataFrame: GeoDataFrame with single geometry in crs
+    """
+
+    geom = shapely.from_geojson(orjson.dumps(geometry))
+    if crs != 4326:
+        geom = reproject_geometry(geom, 4326, crs)
+    return gpd.GeoDataFrame(geometry=[geom], crs=crs)
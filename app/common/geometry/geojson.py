@@ -0,0 +1,79 @@
+from typing import Iterator
+
+import geopandas as gpd
+import orjson
+from fastapi.responses import StreamingResponse
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+CHUNK_SIZE = 64 * 1024
+
+
+def iter_feature_collection(gdf: gpd.GeoDataFrame) -> Iterator[bytes]:
+    """
+    Function serializes GeoDataFrame to GeoJSON FeatureCollection feature by feature
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame to serialize
+    Returns:
+        Iterator[bytes]: FeatureCollection bytes chunks of about CHUNK_SIZE
+    """
+
+    buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+    for i, feature in enumerate(gdf.iterfeatures(na="null", show_bbox=False)):
+        if i:
+            buffer += b","
+        buffer += orjson.dumps(feature, option=ORJSON_OPTIONS)
+        if len(buffer) >= CHUNK_SIZE:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b"]}"
+    yield bytes(buffer)
+
+
+def iter_feature_collections(
+    collections: dict[str, gpd.GeoDataFrame],
+) -> Iterator[bytes]:
+    """
+    Function serializes several GeoDataFrames to JSON object with FeatureCollection values
+    Args:
+        collections (dict[str, gpd.GeoDataFrame]): GeoDataFrames by response keys
+    Returns:
+        Iterator[bytes]: JSON object bytes chunks
+    """
+
+    yield b"{"
+    for i, (key, gdf) in enumerate(collections.items()):
+        yield (b"," if i else b"") + orjson.dumps(key) + b":"
+        yield from iter_feature_collection(gdf)
+    yield b"}"
+
+
+def geojson_response(
+    content: gpd.GeoDataFrame | dict[str, gpd.GeoDataFrame],
+) -> StreamingResponse:
+    """
+    Function builds streaming GeoJSON response without materializing the whole payload in memory
+    Args:
+        content (gpd.GeoDataFrame | dict[str, gpd.GeoDataFrame]): GeoDataFrame or GeoDataFrames by response keys
+    Returns:
+        StreamingResponse: response with application/json media type
+    """
+
+    if isinstance(content, gpd.GeoDataFrame):
+        return StreamingResponse(
+            iter_feature_collection(content), media_type="application/json"
+        )
+    return StreamingResponse(
+        iter_feature_collections(content), media_type="application/json"
+    )
+
+
+def geojson_bytes(gdf: gpd.GeoDataFrame) -> bytes:
+    """
+    Function serializes GeoDataFrame to GeoJSON FeatureCollection bytes, same as GeoDataFrame.to_json
+    Args:
+        gdf (gpd.GeoDataFrame): GeoDataFrame to serialize
+    Returns:
+        bytes: GeoJSON FeatureCollection
+    """
+
+    return b"".join(iter_feature_collection(gdf))
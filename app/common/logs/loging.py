@@ -3,7 +3,15 @@ import sys
 from loguru import logger
 
 
-def init_logger():
+def init_logger(diagnose: bool = True):
+    """
+    Function configures loguru sinks for stderr and log file. Records are written from a separate thread, so
+    logging does not block the event loop.
+    Args:
+        diagnose (bool): whether to collect full backtrace and locals for exceptions. Expensive on geopandas
+        tracebacks, so it should be enabled only for development.
+    """
+
     logger.remove()
     log_level = "DEBUG"
     log_format = "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <yellow>Line {line: >4} ({file}):</yellow> <b>{message}</b>"
@@ -12,14 +20,16 @@ def init_logger():
         level=log_level,
         format=log_format,
         colorize=True,
-        backtrace=True,
-        diagnose=True,
+        backtrace=diagnose,
+        diagnose=diagnose,
+        enqueue=True,
     )
     logger.add(
         ".log",
         level=log_level,
         format=log_format,
         colorize=False,
-        backtrace=True,
-        diagnose=True,
+        backtrace=diagnose,
+        diagnose=diagnose,
+        enqueue=True,
     )
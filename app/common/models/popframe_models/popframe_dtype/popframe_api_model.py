@@ -1,5 +1,9 @@
 from dataclasses import dataclass
+from functools import cached_property
 
+from popframe.method.anchor_settlement import AnchorSettlementBuilder
+from popframe.method.spatial_inequality import SpatialInequalityCalculator
+from popframe.method.territory_evaluation import TerritoryEvaluation
 from popframe.models.region import Region
 from pydantic import field_validator
 
@@ -22,6 +26,39 @@ class PopFrameAPIModel:
     def validate_region_id(cls, v: int):
         return validate_region(v)
 
+    @cached_property
+    def inequality_calculator(self) -> SpatialInequalityCalculator:
+        """
+        Spatial inequality calculator for region model, built on first access
+        """
+
+        return SpatialInequalityCalculator(region=self.region_model)
+
+    @cached_property
+    def anchor_builder(self) -> AnchorSettlementBuilder:
+        """
+        Anchor settlement builder for region model, built on first access
+        """
+
+        return AnchorSettlementBuilder(region=self.region_model)
+
+    @cached_property
+    def territory_evaluation(self) -> TerritoryEvaluation:
+        """
+        Territory evaluation for region model, built on first access
+        """
+
+        return TerritoryEvaluation(region=self.region_model)
+
+    def warm_up(self) -> None:
+        """
+        Function builds territory evaluation ahead of the first request, blocking, should be run in thread
+        Returns:
+            None
+        """
+
+        _ = self.territory_evaluation
+
 
 class PopFrameRegionalScenarioModel(PopFrameAPIModel):
 
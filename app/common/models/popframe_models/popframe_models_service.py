@@ -1,4 +1,6 @@
+import asyncio
 import json
+from collections import OrderedDict, defaultdict
 
 import geopandas as gpd
 import pandas as pd
@@ -6,7 +8,6 @@ from loguru import logger
 from popframe.method.agglomeration import AgglomerationBuilder
 from popframe.method.city_evaluation import CityPopulationScorer
 from popframe.method.popuation_frame import PopulationFrame
-from popframe.method.territory_evaluation import TerritoryEvaluation
 from popframe.models.region import Region
 from popframe.preprocessing.level_filler import LevelFiller
 
@@ -16,11 +17,13 @@ from app.common.gateways.urban_api_gateway import UrbanAPIGateway
 from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
     PopFrameAPIModel,
 )
+from app.common.models.popframe_models.popframe_scores import extract_scores
 from app.common.models.popframe_models.services.popframe_models_api_service import (
     PopFrameModelApiService,
 )
 from app.common.storage.geoserver.goserver import GeoserverStorage
 from app.common.storage.models.pop_frame_caching_service import PopFrameCachingService
+from app.common.tasks.single_flight import SingleFlight
 from app.common.validators.region_validators import validate_region
 
 
@@ -34,6 +37,8 @@ class PopFrameModelsService:
         pop_frame_model_api_service: PopFrameModelApiService,
         urban_api_gateway: UrbanAPIGateway,
         territories_checker: TerritoryChecker,
+        models_cache_size: int = 16,
+        max_parallel_calculations: int = 4,
     ):
 
         self.geoserver_storage = geoserver_storage
@@ -41,6 +46,35 @@ class PopFrameModelsService:
         self.pop_frame_model_api_service = pop_frame_model_api_service
         self.urban_api_gateway = urban_api_gateway
         self.territories_checker = territories_checker
+        self._region_locks: defaultdict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._models: OrderedDict[int, PopFrameAPIModel] = OrderedDict()
+        self.models_cache_size = models_cache_size
+        self.max_parallel_calculations = max_parallel_calculations
+        self._calculations = SingleFlight()
+        self._loads = SingleFlight()
+        self._models_versions: defaultdict[int, int] = defaultdict(int)
+
+    def get_region_lock(self, region_id: int) -> asyncio.Lock:
+        """
+        Function returns lock guarding model calculation for region
+        Args:
+            region_id (int): region id
+        Returns:
+            asyncio.Lock: lock shared by all coroutines working with region model
+        """
+
+        return self._region_locks[region_id]
+
+    def get_model_version(self, region_id: int) -> int:
+        """
+        Function returns version of region model, incremented on each model recalculation in this process
+        Args:
+            region_id (int): region id
+        Returns:
+            int: model version
+        """
+
+        return self._models_versions[region_id]
 
     @staticmethod
     async def create_model(
@@ -64,7 +98,8 @@ class PopFrameModelsService:
 
         local_crs = region_borders.estimate_utm_crs()
         try:
-            region_model = Region(
+            region_model = await asyncio.to_thread(
+                Region,
                 region=region_borders.to_crs(local_crs),
                 towns=towns.to_crs(local_crs),
                 accessibility_matrix=adj_mx,
@@ -84,7 +119,41 @@ class PopFrameModelsService:
                 _detail={"Error": repr(e)},
             )
 
+    @staticmethod
+    def build_agglomeration_layers(
+        model: Region,
+    ) -> tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]:
+        """
+        Function builds agglomerations and towns agglomeration status layers for region model
+        Args:
+            model (Region): PopFrame regional model
+        Returns:
+            tuple[gpd.GeoDataFrame, gpd.GeoDataFrame]: agglomerations and towns with agglomeration status
+        """
+
+        frame_method = PopulationFrame(region=model)
+        gdf_frame = frame_method.build_circle_frame()
+        builder = AgglomerationBuilder(region=model)
+        agglomeration_gdf = builder.get_agglomerations()
+        towns_with_status = builder.evaluate_city_agglomeration_status(
+            gdf_frame, agglomeration_gdf
+        )
+        return agglomeration_gdf, towns_with_status
+
     async def calculate_model(self, region_id: int) -> None:
+        """
+        Function calculates popframe model for region. Concurrent calls for the same region share one calculation
+        Args:
+            region_id (int): region id
+        Returns:
+            None
+        """
+
+        await self._calculations.run(
+            region_id, lambda: self._calculate_model(region_id)
+        )
+
+    async def _calculate_model(self, region_id: int) -> None:
         """
         Function calculates popframe model for region
         Args:
@@ -144,12 +213,10 @@ class PopFrameModelsService:
             region_model=model,
             region_id=region_id,
         )
-        frame_method = PopulationFrame(region=model)
-        gdf_frame = frame_method.build_circle_frame()
-        builder = AgglomerationBuilder(region=model)
-        agglomeration_gdf = builder.get_agglomerations()
-        towns_with_status = builder.evaluate_city_agglomeration_status(
-            gdf_frame, agglomeration_gdf
+        self._models.pop(region_id, None)
+        self._models_versions[region_id] += 1
+        agglomeration_gdf, towns_with_status = await asyncio.to_thread(
+            self.build_agglomeration_layers, model
         )
         agglomeration_indicators = towns_with_status[
             "agglomeration_status"
@@ -190,15 +257,14 @@ class PopFrameModelsService:
                 )
             )
             scorer = CityPopulationScorer(region_mo, polygon_gdf)
-            return pd.DataFrame(scorer.run())["score"].tolist()
+            return extract_scores(await asyncio.to_thread(scorer.run))
         else:
-            evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
-            scores = []
-            result = evaluation.population_criterion(territories_gdf=polygon_gdf)
+            evaluation = popframe_region_model.territory_evaluation
+            result = await asyncio.to_thread(
+                evaluation.population_criterion, territories_gdf=polygon_gdf
+            )
             if result:
-                for res in result:
-                    scores.append(float(res["score"]))
-                return scores
+                return extract_scores(result)
 
     async def calculate_regional_scenario_model(
         self, region_id: int, regional_scenario_id: int
@@ -248,12 +314,8 @@ class PopFrameModelsService:
             adj_mx=matrix,
             region_id=region_id,
         )
-        frame_method = PopulationFrame(region=model)
-        gdf_frame = frame_method.build_circle_frame()
-        builder = AgglomerationBuilder(region=model)
-        agglomeration_gdf = builder.get_agglomerations()
-        towns_with_status = builder.evaluate_city_agglomeration_status(
-            gdf_frame, agglomeration_gdf
+        agglomeration_gdf, towns_with_status = await asyncio.to_thread(
+            self.build_agglomeration_layers, model
         )
         agglomeration_indicators = towns_with_status[
             "agglomeration_status"
@@ -269,6 +331,27 @@ class PopFrameModelsService:
             hexagons["popframe_estimation"], regional_scenario_id, region_id
         )
 
+    async def calculate_models(self, regions_ids: list[int]) -> None:
+        """
+        Function calculates models for regions concurrently, at most max_parallel_calculations at a time.
+        Errors are logged and do not stop other regions calculation
+        Args:
+            regions_ids (list[int]): regions ids to calculate
+        Returns:
+            None
+        """
+
+        semaphore = asyncio.Semaphore(self.max_parallel_calculations)
+
+        async def calculate(region_id: int) -> None:
+            async with semaphore:
+                try:
+                    await self.calculate_model(region_id=region_id)
+                except Exception as e:
+                    logger.exception(e)
+
+        await asyncio.gather(*[calculate(region_id) for region_id in regions_ids])
+
     async def load_and_cache_all_models(self):
         """
         Functions loads and cashes all available models
@@ -277,11 +360,7 @@ class PopFrameModelsService:
         """
 
         regions_ids_to_process = await self.pop_frame_model_api_service.get_regions()
-        for region_id in regions_ids_to_process:
-            try:
-                await self.calculate_model(region_id=region_id)
-            except Exception as e:
-                logger.exception(e)
+        await self.calculate_models(regions_ids_to_process)
 
     async def load_and_cache_all_models_on_startup(self):
         """
@@ -297,31 +376,68 @@ class PopFrameModelsService:
         except Exception as e:
             logger.exception(e)
             return
-        for region_id in regions_to_calculate:
-            try:
-                await self.calculate_model(region_id=region_id)
-            except Exception as e:
-                logger.exception(e)
-                continue
+        await self.calculate_models(regions_to_calculate)
 
     async def get_model(
         self,
         region_id: int,
     ) -> PopFrameAPIModel:
         """
-        Function gets model for region
+        Function gets model for region. Loaded models are kept in memory LRU cache
         Args:
             region_id (int): region id
         Returns:
             PopFrameAPIModel: PopFrameAPIModel model for region
         """
 
+        if region_id in self._models:
+            self._models.move_to_end(region_id)
+            return self._models[region_id]
         if not await self.pop_frame_caching_service.check_path(region_id=region_id):
-            await self.calculate_model(region_id=region_id)
-        model = await self.pop_frame_caching_service.load_cached_model(
-            region_id=region_id
+            async with self.get_region_lock(region_id):
+                if not await self.pop_frame_caching_service.check_path(
+                    region_id=region_id
+                ):
+                    await self.calculate_model(region_id=region_id)
+        version = self.get_model_version(region_id)
+        return await self._loads.run(
+            (region_id, version), lambda: self._load_model(region_id, version)
+        )
+
+    async def model_exists(self, region_id: int) -> bool:
+        """
+        Function checks whether model for region is loaded or cached, without loading it
+        Args:
+            region_id (int): region id
+        Returns:
+            bool: whether model exists
+        """
+
+        return (
+            region_id in self._models
+            or await self.pop_frame_caching_service.check_path(region_id=region_id)
+        )
+
+    async def _load_model(self, region_id: int, version: int) -> PopFrameAPIModel:
+        """
+        Function loads cached model for region and puts it to memory cache if model was not recalculated meanwhile
+        Args:
+            region_id (int): region id
+            version (int): region model version at the moment load started
+        Returns:
+            PopFrameAPIModel: PopFrameAPIModel model for region
+        """
+
+        model = PopFrameAPIModel(
+            region_id,
+            await self.pop_frame_caching_service.load_cached_model(region_id=region_id),
         )
-        return PopFrameAPIModel(region_id, model)
+        await asyncio.to_thread(model.warm_up)
+        if self.get_model_version(region_id) == version:
+            self._models[region_id] = model
+            if len(self._models) > self.models_cache_size:
+                self._models.popitem(last=False)
+        return model
 
     async def get_available_regions(self) -> list[int]:
         """
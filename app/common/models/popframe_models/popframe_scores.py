@@ -0,0 +1,89 @@
+from operator import itemgetter
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+_location_fields = itemgetter(
+    "closest_settlement", "closest_settlement1", "closest_settlement2", "interpretation"
+)
+
+
+def extract_scores(result: list[dict] | np.ndarray | pd.DataFrame) -> list[float]:
+    """
+    Function extracts scores from popframe scoring result without building intermediate DataFrame
+    Args:
+        result (list[dict] | np.ndarray | pd.DataFrame): scoring result with "score" field for each territory
+    Returns:
+        list[float]: scores in the order of scored territories
+    """
+
+    return scores_array(result).tolist()
+
+
+def scores_array(result: list[dict] | np.ndarray | pd.DataFrame) -> np.ndarray:
+    """
+    Function collects scores from popframe scoring result to float64 array
+    Args:
+        result (list[dict] | np.ndarray | pd.DataFrame): scoring result with "score" field for each territory
+    Returns:
+        np.ndarray: float64 scores array in the order of scored territories
+    """
+
+    if isinstance(result, (np.ndarray, pd.DataFrame)):
+        return np.asarray(result["score"], dtype=np.float64)
+    return np.fromiter(
+        (res["score"] for res in result), dtype=np.float64, count=len(result)
+    )
+
+
+def location_interpretations(result: list[dict]) -> list[str]:
+    """
+    Function builds interpretation comments for territory location evaluation result with closest settlements names
+    Args:
+        result (list[dict]): territory location evaluation result
+    Returns:
+        list[str]: interpretations in the order of evaluated territories
+    """
+
+    interpretations = []
+    for *closest_settlements, interpretation in map(_location_fields, result):
+        settlements = ", ".join(filter(None, closest_settlements))
+        interpretation = f"{interpretation}"
+        if settlements:
+            interpretation += f" (Ближайший населенный пункт: {settlements})."
+        interpretations.append(interpretation)
+    return interpretations
+
+
+def scenario_indicators_values(
+    indicator_id: int,
+    scenario_id: int,
+    values: Iterable[float],
+    comments: Iterable[str],
+    properties: dict | None = None,
+) -> list[dict]:
+    """
+    Function builds Urban API scenario indicator values bodies from one shared template
+    Args:
+        indicator_id (int): indicator id from Urban API
+        scenario_id (int): scenario id from Urban API
+        values (Iterable[float]): indicator values
+        comments (Iterable[str]): comments for values in the same order
+        properties (dict | None): properties shared by all values. Defaults to None.
+    Returns:
+        list[dict]: indicator values bodies
+    """
+
+    template = {
+        "indicator_id": indicator_id,
+        "scenario_id": scenario_id,
+        "territory_id": None,
+        "hexagon_id": None,
+        "information_source": "modeled PopFrame",
+        "properties": properties or {},
+    }
+    return [
+        {**template, "value": value, "comment": comment}
+        for value, comment in zip(values, comments)
+    ]
@@ -10,7 +10,9 @@ import pandas as pd
 import requests
 from iduconfig import Config
 from loguru import logger
+from requests.adapters import HTTPAdapter
 from shapely.geometry import shape
+from urllib3.util.retry import Retry
 
 from app.common.api_handler.api_handler import APIHandler
 from app.common.exceptions.http_exception_wrapper import http_exception
@@ -31,6 +33,15 @@ class PopFrameModelApiService:
         self.urban_api_handler = urban_api_handler
         self.max_extractions_per_request = max_extraction_per_request
         self.config = config
+        # keep-alive pool for pickled responses which APIHandler can't parse
+        self.transportframe_session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2),
+        )
+        self.transportframe_session.mount("http://", adapter)
+        self.transportframe_session.mount("https://", adapter)
 
     async def get_base_regional_scenario_by_territory(self, territory_id: int) -> int:
         """
@@ -257,7 +268,20 @@ class PopFrameModelApiService:
             500, internal error, matrix parsing fails
         """
 
-        response = requests.get(
+        return await asyncio.to_thread(self._retrieve_tf_cities, region_id)
+
+    def _retrieve_tf_cities(self, region_id: int) -> gpd.GeoDataFrame:
+        """
+        Function retrieves and unpickles cities for region in matrix, blocking, should be run in thread
+        Args:
+            region_id (int): region id
+        Returns:
+            gpd.GeoDataFrame: gdf with territories
+        Raises:
+            Any HTTP from TransportFrame API
+        """
+
+        response = self.transportframe_session.get(
             url=f"{self.transportframe_api_handler.base_url}/{region_id}/get_towns",
         )
         if response.status_code != 200:
@@ -0,0 +1,37 @@
+from typing import Any
+
+from pydantic import BaseModel
+
+
+def _resolve_refs(schema: Any, defs: dict) -> Any:
+    """
+    Function replaces "$defs" references in JSON schema part with referenced definitions
+    Args:
+        schema (Any): JSON schema part
+        defs (dict): schema definitions from "$defs"
+    Returns:
+        Any: JSON schema part without references
+    """
+
+    if isinstance(schema, list):
+        return [_resolve_refs(i, defs) for i in schema]
+    if not isinstance(schema, dict):
+        return schema
+    if "$ref" in schema:
+        return _resolve_refs(defs[schema["$ref"].removeprefix("#/$defs/")], defs)
+    return {key: _resolve_refs(value, defs) for key, value in schema.items()}
+
+
+def inline_json_schema(model: type[BaseModel]) -> dict:
+    """
+    Function builds model JSON schema with nested definitions inlined, so it can be used in openapi_extra
+    without registering them in OpenAPI components
+    Args:
+        model (type[BaseModel]): pydantic model
+    Returns:
+        dict: self-contained JSON schema
+    """
+
+    schema = model.model_json_schema()
+    defs = schema.pop("$defs", {})
+    return _resolve_refs(schema, defs)
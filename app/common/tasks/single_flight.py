@@ -0,0 +1,46 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Class for coalescing concurrent calls with the same key into one running task.
+    Callers arriving while task for their key is running await its result instead of starting the work again.
+    """
+
+    def __init__(self) -> None:
+
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        """
+        Function removes finished task from running tasks
+        Args:
+            key (Hashable): task key
+            task (asyncio.Task): finished task
+        Returns:
+            None
+        """
+
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Function runs func for key or joins already running call for the same key
+        Args:
+            key (Hashable): call key, e.g. region id
+            func (Callable[[], Awaitable[Any]]): coroutine function to run if no call for key is running
+        Returns:
+            Any: func result
+        Raises:
+            Any exception raised by func, propagated to every waiting caller
+        """
+
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            task = asyncio.create_task(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        # shield keeps the shared work running if one of the waiting requests is cancelled
+        return await asyncio.shield(task)
@@ -0,0 +1,97 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from loguru import logger
+
+
+class TaskQueue:
+    """
+    Class for running background jobs on a fixed pool of worker coroutines with bounded queue.
+    Jobs put with a key are deduplicated, while job with the same key is waiting new one is not added. Key is released
+    when job is taken by worker, so job put during the run of the same key job is added and sees fresh data.
+    """
+
+    def __init__(self, workers_count: int = 8, maxsize: int = 1000) -> None:
+        """
+        Initialisation function
+        Args:
+            workers_count (int): Number of concurrently running jobs.
+            maxsize (int): Max number of waiting jobs, put waits for free place when queue is full.
+        Returns:
+            None
+        """
+
+        self.workers_count = workers_count
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._workers: list[asyncio.Task] = []
+        self._keys: set[Hashable] = set()
+
+    async def _worker(self) -> None:
+        """
+        Function runs jobs from queue until cancelled
+        Returns:
+            None
+        """
+
+        while True:
+            key, func, args, kwargs = await self._queue.get()
+            self._keys.discard(key)
+            try:
+                await func(*args, **kwargs)
+            except Exception as e:
+                logger.exception(f"Background job {func.__name__} failed: {repr(e)}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        """
+        Function starts worker coroutines
+        Returns:
+            None
+        """
+
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker()) for _ in range(self.workers_count)
+            ]
+
+    async def stop(self) -> None:
+        """
+        Function cancels worker coroutines, jobs left in queue are dropped
+        Returns:
+            None
+        """
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def put(
+        self,
+        func: Callable[..., Awaitable[Any]],
+        *args: Any,
+        key: Hashable | None = None,
+        **kwargs: Any,
+    ) -> bool:
+        """
+        Function adds job to queue
+        Args:
+            func (Callable[..., Awaitable[Any]]): coroutine function to run
+            *args (Any): func positional arguments
+            key (Hashable | None): job key for deduplication. Defaults to None, job is always added.
+            **kwargs (Any): func keyword arguments
+        Returns:
+            bool: False if job with the same key is already waiting, otherwise True
+        """
+
+        if key is not None:
+            if key in self._keys:
+                return False
+            self._keys.add(key)
+        try:
+            await self._queue.put((key, func, args, kwargs))
+        except BaseException:
+            self._keys.discard(key)
+            raise
+        return True
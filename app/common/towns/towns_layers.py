@@ -1,13 +1,17 @@
 import asyncio
+from collections import defaultdict
 
 import geopandas as gpd
 import pandas as pd
 from loguru import logger
 from pyogrio.errors import DataSourceError
 
+from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.geometry.crs import ensure_wgs84
 from app.common.storage.models.gdf_caching_service import GDFCachingService
+from app.common.tasks.single_flight import SingleFlight
+from app.common.towns.towns_api_service import TownsAPIService
 from app.common.validators.region_validators import validate_region
-from app.dependencies import TownsAPIService, http_exception
 
 
 class TownsLayers:
@@ -19,18 +23,85 @@ class TownsLayers:
         self,
         towns_api_service: TownsAPIService,
         towns_caching_service: GDFCachingService,
+        max_parallel_regions: int = 8,
     ) -> None:
         """
         Initializes the TownsLayers with a TownsAPIService instance.
         Args:
             towns_api_service (TownsAPIService): An instance of TownsAPIService to handle API requests for towns data.
+            towns_caching_service (GDFCachingService): Towns layers file cache.
+            max_parallel_regions (int): Max number of regions processed concurrently on full recaching.
         Returns:
             None
         """
         self.towns_api_service = towns_api_service
         self.towns_caching_service = towns_caching_service
+        self._towns: dict[int, gpd.GeoDataFrame] = {}
+        self._anchor_towns: dict[int, gpd.GeoDataFrame] = {}
+        self._retrievals = SingleFlight()
+        self._towns_versions: defaultdict[int, int] = defaultdict(int)
+        self.max_parallel_regions = max_parallel_regions
+
+    def get_towns_version(self, region_id: int) -> int:
+        """
+        Function returns version of region towns layer, incremented each time the layer is replaced in memory
+        Args:
+            region_id (int): Region ID.
+        Returns:
+            int: towns layer version
+        """
+
+        return self._towns_versions[region_id]
+
+    @staticmethod
+    def get_max_level(towns: gpd.GeoDataFrame) -> int | None:
+        """
+        Function returns max towns level, precomputed in attrs for stored layers
+        Args:
+            towns (gpd.GeoDataFrame): Towns layer.
+        Returns:
+            int | None: max level, None if layer has no levels
+        """
+
+        if "max_level" in towns.attrs:
+            return towns.attrs["max_level"]
+        return int(towns["level"].max()) if towns["level"].notna().any() else None
+
+    def _store_towns(self, region_id: int, towns: gpd.GeoDataFrame) -> gpd.GeoDataFrame:
+        """
+        Function stores towns layer in memory cache in 4326 crs with precomputed max level in attrs, None for layer
+        without levels
+        Args:
+            region_id (int): Region ID.
+            towns (gpd.GeoDataFrame): Towns layer.
+        Returns:
+            gpd.GeoDataFrame: Shallow copy of stored towns layer.
+        """
+
+        towns = ensure_wgs84(towns)
+        towns.attrs["max_level"] = (
+            int(towns["level"].max()) if towns["level"].notna().any() else None
+        )
+        self._towns[region_id] = towns
+        self._anchor_towns.pop(region_id, None)
+        self._towns_versions[region_id] += 1
+        return towns.copy(deep=False)
 
     async def _retrieve_towns_for_region(self, region_id: int) -> gpd.GeoDataFrame:
+        """
+        Function retrieves towns for a given region. Concurrent calls for the same region share one retrieval.
+        Args:
+            region_id (str): Region ID.
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame containing towns for a given region with formed data.
+        """
+
+        towns = await self._retrievals.run(
+            region_id, lambda: self._build_towns_for_region(region_id)
+        )
+        return towns.copy(deep=False)
+
+    async def _build_towns_for_region(self, region_id: int) -> gpd.GeoDataFrame:
         """
         Function to retrieve towns for a given region.
         Args:
@@ -94,15 +165,9 @@ class TownsLayers:
         )
         result = pd.concat([towns, combined_towns_layer], axis=1)
         result.set_index("id", inplace=True, drop=True)
-        result[target_columns] = result[target_columns].apply(
-            lambda x: (
-                [round(i, 2) if i else i for i in x]
-                if float in list(set(x.apply(type)))
-                else x
-            )
-        )
+        result[target_columns] = result[target_columns].round(2)
         self.towns_caching_service.cache_gdf(region_id, result)
-        return result
+        return self._store_towns(region_id, result)
 
     async def get_towns(self, region_id: int, force: bool = False) -> gpd.GeoDataFrame:
         """
@@ -111,18 +176,21 @@ class TownsLayers:
             region_id (int): The ID of the territory.
             force (bool, optional): Whether to force caching.
         Returns:
-            gpd.GeoDataFrame: A GeoDataFrame containing the towns of the territory in 4326 crs.
+            gpd.GeoDataFrame: A GeoDataFrame containing the towns of the territory in 4326 crs. Returned frame is
+            a shallow copy of in-memory cached layer, so callers can reindex it without affecting the cache.
         Raises:
             Any HTTP exception from Towns API.
         """
 
         validate_region(region_id)
+        if not force and region_id in self._towns:
+            return self._towns[region_id].copy(deep=False)
         try:
             if force:
                 logger.info(f"Force caching towns for region {region_id}")
                 return await self._retrieve_towns_for_region(region_id)
             towns = self.towns_caching_service.read_gdf(region_id)
-            return towns
+            return self._store_towns(region_id, towns)
         except FileNotFoundError:
             logger.info(
                 f"Towns not found in cache for region {region_id}, retrieving from API"
@@ -142,6 +210,28 @@ class TownsLayers:
                 _detail={"error": repr(e)},
             ) from e
 
+    async def get_anchor_towns(self, region_id: int) -> gpd.GeoDataFrame:
+        """
+        Function retrieves towns for region indexed by territory_id with "id" column, as anchor settlements
+        builder expects. Reindexed layer is built once per cached towns layer.
+        Args:
+            region_id (int): The ID of the territory.
+        Returns:
+            gpd.GeoDataFrame: A GeoDataFrame containing the towns of the territory in 4326 crs.
+        Raises:
+            Any HTTP exception from Towns API.
+        """
+
+        anchor_towns = self._anchor_towns.get(region_id)
+        if anchor_towns is None:
+            version = self.get_towns_version(region_id)
+            towns = await self.get_towns(region_id)
+            anchor_towns = towns.reset_index(drop=False).set_index("territory_id")
+            # layer stored or replaced during retrieval is reindexed again on next call, so stale one isn't cached
+            if self.get_towns_version(region_id) == version:
+                self._anchor_towns[region_id] = anchor_towns
+        return anchor_towns.copy(deep=False)
+
     async def cache_all_towns(self) -> None:
         """
         Function caches all towns for a given region.
@@ -150,9 +240,13 @@ class TownsLayers:
         """
 
         regions = await self.towns_api_service.get_all_regions()
-        for region_id in regions:
-            try:
-                await self.get_towns(region_id, force=True)
-            except Exception as e:
-                logger.exception(e)
-                continue
+        semaphore = asyncio.Semaphore(self.max_parallel_regions)
+
+        async def cache_towns(region_id: int) -> None:
+            async with semaphore:
+                try:
+                    await self.get_towns(region_id, force=True)
+                except Exception as e:
+                    logger.exception(e)
+
+        await asyncio.gather(*[cache_towns(region_id) for region_id in regions])
@@ -1,13 +1,17 @@
+import os
+from functools import lru_cache
 from pathlib import Path
+from typing import Any, Awaitable, Callable
 
 from iduconfig import Config
-from prometheus_client import start_http_server
 
 from app.common.api_handler.api_handler import APIHandler
 from app.common.checkers.territory_checker import TerritoryChecker
 from app.common.exceptions.http_exception_wrapper import http_exception
 from app.common.gateways.urban_api_gateway import UrbanAPIGateway
-from app.common.logs.loging import init_logger
+from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
+    PopFrameAPIModel,
+)
 from app.common.models.popframe_models.popframe_models_service import (
     PopFrameModelsService,
 )
@@ -17,54 +21,151 @@ from app.common.models.popframe_models.services.popframe_models_api_service impo
 from app.common.storage.geoserver.goserver import GeoserverStorage
 from app.common.storage.models.gdf_caching_service import GDFCachingService
 from app.common.storage.models.pop_frame_caching_service import PopFrameCachingService
+from app.common.tasks.task_queue import TaskQueue
 from app.common.towns.towns_api_service import TownsAPIService
 from app.common.towns.towns_layers import TownsLayers
+from app.common.validators.region_validators import validate_region
 
-init_logger()
 config = Config()
 
-start_http_server(
-    int(config.get("PROMETHEUS_PORT")),
-)
+PROJECT_ROOT = Path.cwd().resolve()
 
 urban_api_handler = APIHandler(config.get("URBAN_API"))
 transportframe_api_handler = APIHandler(config.get("TRANSPORTFRAME_API"))
 townsnet_api_handler = APIHandler(config.get("TOWNSNET_API"))
 socdemo_api_handler = APIHandler(config.get("SOCDEMO_API"))
 
-towns_caching_service = GDFCachingService(
-    Path().absolute() / config.get("COMMON_CACHE") / config.get("POPFRAME_TOWNS_CACHE")
+urban_api_gateway = UrbanAPIGateway(
+    urban_api_handler,
+    # optional flag, batch indicators upload is not supported by every Urban API deployment
+    bulk_indicators_upload=os.getenv("URBAN_API_BULK_INDICATORS") == "true",
 )
-urban_api_gateway = UrbanAPIGateway(urban_api_handler)
 townsnet_api_service = TownsAPIService(
     urban_api_handler, townsnet_api_handler, socdemo_api_handler
 )
 
 territory_checker = TerritoryChecker(urban_api_gateway)
 
-towns_layers = TownsLayers(townsnet_api_service, towns_caching_service)
-geoserver_storage = GeoserverStorage(
-    cache_path=Path().absolute()
-    / config.get("COMMON_CACHE")
-    / config.get("GEOSERVER_CACHE_PATH"),
-    config=config,
-)
-
 pop_frame_model_api_service = PopFrameModelApiService(
     config, transportframe_api_handler, urban_api_handler
 )
-pop_frame_caching_service = PopFrameCachingService(
-    (
-        Path().absolute()
+
+task_queue = TaskQueue()
+
+
+@lru_cache
+def get_towns_layers() -> TownsLayers:
+    """
+    Function returns towns layers service, created on first call
+    Returns:
+        TownsLayers: towns layers service with file cache
+    """
+
+    towns_caching_service = GDFCachingService(
+        PROJECT_ROOT / config.get("COMMON_CACHE") / config.get("POPFRAME_TOWNS_CACHE")
+    )
+    return TownsLayers(townsnet_api_service, towns_caching_service)
+
+
+@lru_cache
+def get_geoserver_storage() -> GeoserverStorage:
+    """
+    Function returns geoserver storage, created on first call
+    Returns:
+        GeoserverStorage: geoserver storage with layers file cache
+    """
+
+    return GeoserverStorage(
+        cache_path=PROJECT_ROOT
         / config.get("COMMON_CACHE")
-        / config.get("POPFRAME_MODEL_CACHE")
-    ),
-    config,
-)
-pop_frame_model_service = PopFrameModelsService(
-    geoserver_storage,
-    pop_frame_caching_service,
-    pop_frame_model_api_service,
-    urban_api_gateway,
-    territory_checker,
-)
+        / config.get("GEOSERVER_CACHE_PATH"),
+        config=config,
+    )
+
+
+@lru_cache
+def get_pop_frame_caching_service() -> PopFrameCachingService:
+    """
+    Function returns popframe models caching service, created on first call
+    Returns:
+        PopFrameCachingService: popframe models caching service
+    """
+
+    return PopFrameCachingService(
+        (
+            PROJECT_ROOT
+            / config.get("COMMON_CACHE")
+            / config.get("POPFRAME_MODEL_CACHE")
+        ),
+        config,
+    )
+
+
+@lru_cache
+def get_pop_frame_model_service() -> PopFrameModelsService:
+    """
+    Function returns popframe models service, created on first call
+    Returns:
+        PopFrameModelsService: popframe models service
+    """
+
+    return PopFrameModelsService(
+        get_geoserver_storage(),
+        get_pop_frame_caching_service(),
+        pop_frame_model_api_service,
+        urban_api_gateway,
+        territory_checker,
+    )
+
+
+async def get_popframe_region_model(region_id: int) -> PopFrameAPIModel:
+    """
+    Dependency function returns popframe model for region
+    Args:
+        region_id (int): region id
+    Returns:
+        PopFrameAPIModel: PopFrameAPIModel model for region
+    """
+
+    return await get_pop_frame_model_service().get_model(region_id)
+
+
+async def get_region_with_model(region_id: int) -> int:
+    """
+    Dependency function validates region and checks its popframe model exists without loading the model, so endpoints
+    deferring model loading to background jobs still reject bad regions synchronously
+    Args:
+        region_id (int): region id
+    Returns:
+        int: region id
+    Raises:
+        400, if region is unavailable
+        404, if model for region is not calculated
+    """
+
+    validate_region(region_id)
+    if not await get_pop_frame_model_service().model_exists(region_id):
+        raise http_exception(
+            404,
+            "Model for region is not calculated",
+            _input={"region_id": region_id},
+            _detail={},
+        )
+    return region_id
+
+
+async def run_with_region_model(
+    func: Callable[..., Awaitable[Any]], region_id: int, *args: Any
+) -> Any:
+    """
+    Function resolves popframe model for region and runs func with it, used to defer model loading to background jobs
+    Args:
+        func (Callable[..., Awaitable[Any]]): coroutine function taking PopFrameAPIModel as first argument
+        region_id (int): region id
+        *args (Any): other func arguments
+    Returns:
+        Any: func result
+    """
+
+    model = await get_pop_frame_model_service().get_model(region_id)
+    return await func(model, *args)
@@ -2,11 +2,9 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, RedirectResponse
-from otteroad import (
-    KafkaConsumerService,
-    KafkaConsumerSettings,
-)
+from fastapi.responses import FileResponse, ORJSONResponse, RedirectResponse
+from loguru import logger
+from prometheus_client import start_http_server
 
 from app.common.exceptions.exception_handler import ExceptionHandlerMiddleware
 from app.routers import (
@@ -21,26 +19,33 @@ from app.routers import (
 from app.routers.router_popframe_models import model_calculator_router
 
 from .broker.broker_service import BrokerService
+from .broker.clients import get_consumer
 from .common.exceptions.http_exception_wrapper import http_exception
-from .dependencies import config, pop_frame_model_service
-
-consumer_settings = KafkaConsumerSettings.from_env()
-
-broker_client = KafkaConsumerService(consumer_settings)
-broker_service = BrokerService(config, broker_client, pop_frame_model_service)
+from .common.logs.loging import init_logger
+from .dependencies import config, get_pop_frame_model_service, task_queue
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
+    if not getattr(app.state, "logger_ready", False):
+        init_logger(diagnose=config.get("APP_ENV") == "development")
+        app.state.logger_ready = True
+    start_http_server(int(config.get("PROMETHEUS_PORT")))
+    pop_frame_model_service = get_pop_frame_model_service()
+    broker_service = BrokerService(config, get_consumer(), pop_frame_model_service)
     await pop_frame_model_service.load_and_cache_all_models_on_startup()
     await broker_service.register_and_start()
+    await task_queue.start()
     yield
+    await task_queue.stop()
     await broker_service.stop()
+    await logger.complete()
 
 
 app = FastAPI(
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     title="PopFrame API",
     description="API for PopFrame service, handling territory evaluation, population criteria, network frame, and land use data.",
     version="3.0.5",
@@ -99,5 +104,4 @@ app.include_router(router_frame.network_router)
 app.include_router(router_agglomeration.agglomeration_router)
 app.include_router(router_landuse.landuse_router)
 app.include_router(router_popframe.popframe_router)
-app.include_router(model_calculator_router)
 app.include_router(router_inequality.inequality_router)
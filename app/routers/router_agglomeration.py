@@ -1,13 +1,17 @@
-import json
-from typing import Annotated, Any, Dict
+import asyncio
+from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException
 from popframe.method.agglomeration import AgglomerationBuilder
 from popframe.method.popuation_frame import PopulationFrame
 
+from app.common.models.popframe_models.popframe_models_service import (
+    PopFrameModelsService,
+)
 from app.common.storage.geoserver.geoserver_dto import PopFrameGeoserverDTO
+from app.common.storage.geoserver.goserver import GeoserverStorage
 from app.common.validators.region_validators import validate_region
-from app.dependencies import geoserver_storage, pop_frame_model_service
+from app.dependencies import get_geoserver_storage, get_pop_frame_model_service
 from app.dto import RegionAgglomerationDTO
 
 agglomeration_router = APIRouter(prefix="/agglomeration", tags=["Agglomeration"])
@@ -16,29 +20,41 @@ agglomeration_router = APIRouter(prefix="/agglomeration", tags=["Agglomeration"]
 @agglomeration_router.get(
     "/geoserver/get_href", response_model=list[PopFrameGeoserverDTO]
 )
-async def get_href(region_id: int) -> list[PopFrameGeoserverDTO]:
+async def get_href(
+    region_id: int,
+    geoserver_storage: GeoserverStorage = Depends(get_geoserver_storage),
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+) -> list[PopFrameGeoserverDTO]:
+
+    async def check_layers() -> bool:
+        agglomeration_check, cities_check = await asyncio.gather(
+            geoserver_storage.check_cached_layers(
+                region_id=region_id, layer_type="agglomerations"
+            ),
+            geoserver_storage.check_cached_layers(
+                region_id=region_id, layer_type="cities"
+            ),
+        )
+        return agglomeration_check and cities_check
 
     validate_region(region_id)
-    agglomeration_check = await geoserver_storage.check_cached_layers(
-        region_id=region_id, layer_type="agglomerations"
-    )
-    cities_check = await geoserver_storage.check_cached_layers(
-        region_id=region_id, layer_type="cities"
-    )
-    if agglomeration_check and cities_check:
-        agglomerations = await geoserver_storage.get_layer_from_geoserver(
+    if not await check_layers():
+        async with pop_frame_model_service.get_region_lock(region_id):
+            if not await check_layers():
+                await pop_frame_model_service.calculate_model(region_id)
+    agglomerations, cities = await asyncio.gather(
+        geoserver_storage.get_layer_from_geoserver(
             region_id=region_id,
             layer_type="agglomerations",
-        )
-        cities = await geoserver_storage.get_layer_from_geoserver(
+        ),
+        geoserver_storage.get_layer_from_geoserver(
             region_id=region_id,
             layer_type="cities",
-        )
-        return [agglomerations, cities]
-    else:
-        await pop_frame_model_service.calculate_model(region_id)
-        result = await get_href(region_id)
-        return result
+        ),
+    )
+    return [agglomerations, cities]
 
 
 @agglomeration_router.get("/build_agglomeration")
@@ -46,6 +62,9 @@ async def get_agglomeration_endpoint(
     agglomerations_params: Annotated[
         RegionAgglomerationDTO, Depends(RegionAgglomerationDTO)
     ],
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
 ):
 
     try:
@@ -58,7 +77,7 @@ async def get_agglomeration_endpoint(
         agglomeration_gdf["num_core_cities"] = agglomeration_gdf["core_cities"].apply(
             lambda x: len(x.split(",")) if x else 0
         )
-        result = json.loads(agglomeration_gdf.to_json())
+        result = agglomeration_gdf.to_geo_dict()
         return result
     except Exception as e:
         raise HTTPException(
@@ -66,13 +85,14 @@ async def get_agglomeration_endpoint(
         )
 
 
-@agglomeration_router.get(
-    "/evaluate_city_agglomeration_status", response_model=Dict[str, Any]
-)
+@agglomeration_router.get("/evaluate_city_agglomeration_status")
 async def evaluate_cities_in_agglomeration(
     agglomerations_params: Annotated[
         RegionAgglomerationDTO, Depends(RegionAgglomerationDTO)
     ],
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
 ):
     try:
         popframe_region_model = await pop_frame_model_service.get_model(
@@ -86,7 +106,7 @@ async def evaluate_cities_in_agglomeration(
             gdf_frame, agglomeration_gdf
         )
         towns_with_status.to_crs(4326, inplace=True)
-        result = json.loads(towns_with_status.to_json())
+        result = towns_with_status.to_geo_dict()
         return result
     except Exception as e:
         raise HTTPException(
@@ -1,37 +1,32 @@
-import json
-from typing import Any, Dict
-
+import orjson
 from fastapi import APIRouter, Depends, HTTPException, Query
 from popframe.method.agglomeration import AgglomerationBuilder
 from popframe.method.popuation_frame import PopulationFrame
 
+from app.common.geometry.geojson import ORJSON_OPTIONS
 from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
     PopFrameAPIModel,
 )
-from app.dependencies import pop_frame_model_service
+from app.dependencies import get_popframe_region_model
 
 network_router = APIRouter(prefix="/population", tags=["Population Frame"])
 
 
-@network_router.get("/build_city_frame", response_model=Dict[str, Any])
+@network_router.get("/build_city_frame")
 async def build_circle_frame_endpoint(
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    popframe_region_model: PopFrameAPIModel = Depends(get_popframe_region_model),
 ):
     try:
         frame_method = PopulationFrame(region=popframe_region_model.region_model)
         gdf_frame = frame_method.build_circle_frame()
-        return json.loads(gdf_frame.to_json())
+        return gdf_frame.to_geo_dict()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"An error occurred: {repr(e)}")
 
 
-@network_router.get("/build_agglomeration_frames", response_model=Dict[str, Any])
+@network_router.get("/build_agglomeration_frames")
 def build_agglomeration_frames(
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    popframe_region_model: PopFrameAPIModel = Depends(get_popframe_region_model),
 ):
     try:
         frame_method = PopulationFrame(region=popframe_region_model.region_model)
@@ -50,13 +45,13 @@ def build_agglomeration_frames(
             10, preserve_topology=True
         )
 
-        agglomerations = json.loads(agglomeration_gdf.to_json())
-        towns = json.loads(towns_with_status.to_json())
+        agglomerations = agglomeration_gdf.to_geo_dict()
+        towns = towns_with_status.to_geo_dict()
 
         result = {"agglomerations": agglomerations, "towns": towns}
 
-        with open("agglomerations_result.json", "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=4)
+        with open("agglomerations_result.json", "wb") as f:
+            f.write(orjson.dumps(result, option=ORJSON_OPTIONS | orjson.OPT_INDENT_2))
 
         return result
     except Exception as e:
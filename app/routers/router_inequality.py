@@ -1,65 +1,185 @@
-import json
+import asyncio
 
-from fastapi import APIRouter, Depends
+import numpy as np
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, Response
 from loguru import logger
-from popframe.method.anchor_settlement import AnchorSettlementBuilder
-from popframe.method.spatial_inequality import SpatialInequalityCalculator
 from pydantic_geojson import FeatureCollectionModel
 
 from app.common.auth.bearer import verify_bearer_token
+from app.common.geometry.crs import ensure_wgs84
+from app.common.geometry.geojson import geojson_bytes, geojson_response
+from app.common.models.popframe_models.popframe_models_service import (
+    PopFrameModelsService,
+)
+from app.common.towns.towns_layers import TownsLayers
 from app.common.validators.region_validators import validate_region
 from app.dependencies import (
+    get_pop_frame_model_service,
+    get_towns_layers,
     http_exception,
-    pop_frame_model_service,
-    towns_layers,
     urban_api_gateway,
 )
 
 inequality_router = APIRouter(prefix="/inequality", tags=["inequality"])
 
+# serialized GeoJSON responses keyed by endpoint params and models/towns versions they were built from,
+# bounded by total size of responses in bytes
+responses_cache: TTLCache = TTLCache(maxsize=256 * 1024 * 1024, ttl=3600, getsizeof=len)
+
+
+def _responses_cache_key(
+    endpoint: str,
+    region_id: int,
+    param: int | None,
+    pop_frame_model_service: PopFrameModelsService,
+    towns_layers: TownsLayers,
+) -> tuple:
+    """
+    Function builds responses cache key from endpoint params and current region model and towns versions
+    Args:
+        endpoint (str): endpoint name
+        region_id (int): region ID
+        param (int | None): endpoint specific param
+        pop_frame_model_service (PopFrameModelsService): region models service
+        towns_layers (TownsLayers): towns layers service
+    Returns:
+        tuple: cache key
+    """
+
+    return (
+        endpoint,
+        region_id,
+        param,
+        pop_frame_model_service.get_model_version(region_id),
+        towns_layers.get_towns_version(region_id),
+    )
+
+
+def _cache_response(cache_key: tuple, content: bytes) -> None:
+    """
+    Function stores serialized response in responses cache, responses larger than the whole cache are not stored
+    Args:
+        cache_key (tuple): cache key
+        content (bytes): serialized response
+    Returns:
+        None
+    """
+
+    if len(content) <= responses_cache.maxsize:
+        responses_cache[cache_key] = content
+
 
 @inequality_router.get("/anchor_cities")
-async def get_anchor_cities(region_id: int, time: int = 50):
+async def get_anchor_cities(
+    region_id: int,
+    time: int = 50,
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+    towns_layers: TownsLayers = Depends(get_towns_layers),
+):
 
     validate_region(region_id)
     logger.info(f"Processing anchor cities for region {region_id} at time {time}")
-    model = await pop_frame_model_service.get_model(region_id)
-    builder = AnchorSettlementBuilder(region=model.region_model)
-    towns = await towns_layers.get_towns(region_id)
-    towns.reset_index(inplace=True, drop=False)
-    towns.set_index("territory_id", inplace=True)
-    settlement_boundaries = builder.get_anchor_settlement_boundaries(towns, time=time)
+    content = responses_cache.get(
+        _responses_cache_key(
+            "anchor_cities", region_id, time, pop_frame_model_service, towns_layers
+        )
+    )
+    if content is None:
+        # versions are read right after each load, so the key matches data response is built from
+        towns = await towns_layers.get_anchor_towns(region_id)
+        towns_version = towns_layers.get_towns_version(region_id)
+        model = await pop_frame_model_service.get_model(region_id)
+        cache_key = (
+            "anchor_cities",
+            region_id,
+            time,
+            pop_frame_model_service.get_model_version(region_id),
+            towns_version,
+        )
+        # anchor_builder is built lazily on first access, so it's accessed in the worker thread too
+        settlement_boundaries = await asyncio.to_thread(
+            lambda: model.anchor_builder.get_anchor_settlement_boundaries(
+                towns, time=time
+            )
+        )
+        content = await asyncio.to_thread(
+            geojson_bytes, ensure_wgs84(settlement_boundaries)
+        )
+        _cache_response(cache_key, content)
     logger.info(f"Anchor cities processed successfully for region {region_id}")
-    return json.loads(settlement_boundaries.to_crs(4326).to_json())
+    return Response(content=content, media_type="application/json")
 
 
 @inequality_router.get("/spatial_inequality")
-async def get_spatial_inequality(region_id: int, level: int | None = None):
+async def get_spatial_inequality(
+    region_id: int,
+    level: int | None = None,
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+    towns_layers: TownsLayers = Depends(get_towns_layers),
+):
 
     logger.info(f"Processing spatial inequality for region {region_id}")
-    model = await pop_frame_model_service.get_model(region_id)
+    # levels from max one on are the whole towns layer, so they share one cache entry
     towns = await towns_layers.get_towns(region_id)
-    if level is not None and level < towns["level"].max():
-        aggregate_territories = (
-            await towns_layers.towns_api_service.get_territories_for_region(
-                region_id, get_all_levels=True, level=level
+    max_level = towns_layers.get_max_level(towns)
+    if level is not None and (max_level is None or level >= max_level):
+        level = None
+    content = responses_cache.get(
+        _responses_cache_key(
+            "spatial_inequality",
+            region_id,
+            level,
+            pop_frame_model_service,
+            towns_layers,
+        )
+    )
+    if content is None:
+        towns_version = towns_layers.get_towns_version(region_id)
+        model_version = pop_frame_model_service.get_model_version(region_id)
+        if level is not None:
+            model = await pop_frame_model_service.get_model(region_id)
+            # version is read right after load, so the key matches model response is built from
+            model_version = pop_frame_model_service.get_model_version(region_id)
+            aggregate_territories = (
+                await towns_layers.towns_api_service.get_territories_for_region(
+                    region_id, get_all_levels=True, level=level
+                )
             )
+            spatial_inequality = (
+                await asyncio.to_thread(
+                    lambda: model.inequality_calculator.transfer_inequality_metrics_to_polygons(
+                        towns, aggregate_territories
+                    )
+                )
+            )[0]
+        else:
+            spatial_inequality = towns
+        content = await asyncio.to_thread(
+            geojson_bytes, ensure_wgs84(spatial_inequality)
         )
-        calculator = SpatialInequalityCalculator(region=model.region_model)
-        polygon_spatial_inequality = calculator.transfer_inequality_metrics_to_polygons(
-            towns, aggregate_territories
-        )[0]
-        logger.info(
-            f"Spatial inequality processed successfully for region {region_id} and level {level}"
+        _cache_response(
+            ("spatial_inequality", region_id, level, model_version, towns_version),
+            content,
         )
-        return json.loads(polygon_spatial_inequality.to_crs(4326).to_json())
-    logger.info(f"Spatial inequality processed successfully for region {region_id}")
-    return json.loads(towns.to_crs(4326).to_json())
+    logger.info(
+        f"Spatial inequality processed successfully for region {region_id} and level {level}"
+    )
+    return Response(content=content, media_type="application/json")
 
 
 @inequality_router.get("/context_inequality")
 async def get_context_inequality(
-    project_id: int, token: str | None = Depends(verify_bearer_token)
+    project_id: int,
+    token: str | None = Depends(verify_bearer_token),
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+    towns_layers: TownsLayers = Depends(get_towns_layers),
 ) -> dict[str, FeatureCollectionModel]:
     """
     Endpoint returns spatial inequality for a project context. Auth required (via bearer token).
@@ -80,29 +200,39 @@ async def get_context_inequality(
     """
 
     project_info = await urban_api_gateway.get_project_info(project_id, token)
-    model = await pop_frame_model_service.get_model(project_info["territory"]["id"])
-    towns = await towns_layers.get_towns(project_info["territory"]["id"])
-    context_towns_ids = await urban_api_gateway.get_subterritories_ids_for_ter_ids(
-        project_info["properties"]["context"], get_all_levels=True, cities_only=True
+    region_id = project_info["territory"]["id"]
+    context = project_info["properties"]["context"]
+    model, towns, aggregate_territories = await asyncio.gather(
+        pop_frame_model_service.get_model(region_id),
+        towns_layers.get_towns(region_id),
+        urban_api_gateway.get_territories_gdf_by_ids(context),
     )
-    towns = towns[towns.index.isin(context_towns_ids)]
-    aggregate_territories = await urban_api_gateway.get_territories_gdf_by_ids(
-        project_info["properties"]["context"]
+    # "intersects" rather than "within", so towns lying on context territories border are kept as well
+    context_towns_positions, _ = aggregate_territories.sindex.query(
+        towns.geometry, predicate="intersects"
     )
-    calculator = SpatialInequalityCalculator(region=model.region_model)
-    aggregated_inequality = calculator.transfer_inequality_metrics_to_polygons(
-        towns, aggregate_territories
+    towns = towns.iloc[np.unique(context_towns_positions)]
+    aggregated_inequality = (
+        await asyncio.to_thread(
+            lambda: model.inequality_calculator.transfer_inequality_metrics_to_polygons(
+                towns, aggregate_territories
+            )
+        )
     )[0]
-    return {
-        "polygon_spatial_inequality": json.loads(
-            aggregated_inequality.to_crs(4326).to_json()
-        ),
-        "context_towns_spatial_inequality": json.loads(towns.to_crs(4326).to_json()),
-    }
+    return geojson_response(
+        {
+            "polygon_spatial_inequality": ensure_wgs84(aggregated_inequality),
+            "context_towns_spatial_inequality": ensure_wgs84(towns),
+        }
+    )
 
 
 @inequality_router.put("/cache_towns/{region_id}")
-async def cache_towns_for_region(region_id: int, force: bool = False):
+async def cache_towns_for_region(
+    region_id: int,
+    force: bool = False,
+    towns_layers: TownsLayers = Depends(get_towns_layers),
+):
 
     try:
         await towns_layers.get_towns(region_id, force)
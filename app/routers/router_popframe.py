@@ -1,147 +1,97 @@
-import sys
+import asyncio
 
-import geopandas as gpd
-import requests
-from fastapi import APIRouter, BackgroundTasks, Depends, Query
+import aiohttp
+from fastapi import APIRouter, Depends, Query
 from loguru import logger
-from popframe.method.territory_evaluation import TerritoryEvaluation
 
 from app.common.auth.bearer import verify_bearer_token
+from app.common.geometry.crs import geometry_gdf
 from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
     PopFrameAPIModel,
 )
-from app.dependencies import config, pop_frame_model_service
+from app.common.models.popframe_models.popframe_scores import (
+    extract_scores,
+    location_interpretations,
+    scenario_indicators_values,
+)
+from app.dependencies import (
+    get_region_with_model,
+    run_with_region_model,
+    task_queue,
+    urban_api_gateway,
+)
 
 popframe_router = APIRouter(prefix="/popframe", tags=["PopFrame Evaluation"])
 
-logger.remove()
-logger.add(
-    sys.stdout,
-    format="<green>{time:MM-DD HH:mm}</green> | <level>{level: <8}</level> | <cyan>{message}</cyan>",
-    level="INFO",
-    colorize=True,
-)
-
 
 async def process_combined_evaluation(
     popframe_region_model: PopFrameAPIModel, project_scenario_id: int, token: str
 ):
 
-    scenario_response = requests.get(
-        f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    if scenario_response.status_code != 200:
-        raise Exception("Error retrieving scenario information")
-
-    scenario_data = scenario_response.json()
-    project_id = scenario_data.get("project", {}).get("project_id")
-    if project_id is None:
-        raise Exception("Project ID is missing in scenario data.")
-
-    territory_response = requests.get(
-        f"{config.get('URBAN_API')}/api/v1/projects/{project_id}/territory",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    if territory_response.status_code != 200:
-        raise Exception("Error retrieving territory geometry")
-
-    territory_data = territory_response.json()
-    territory_geometry = territory_data["geometry"]
-    territory_feature = {
-        "type": "Feature",
-        "geometry": territory_geometry,
-        "properties": {},
-    }
-    polygon_gdf = gpd.GeoDataFrame.from_features([territory_feature], crs=4326)
-    polygon_gdf = polygon_gdf.to_crs(popframe_region_model.region_model.crs)
-
-    # Оценка территории
-    evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
+    async with aiohttp.ClientSession() as session:
+        territory_data = await urban_api_gateway.get_scenario_territory(
+            project_scenario_id, token, session=session, use_cache=False
+        )
 
-    # Выполнение первой оценки
-    location_results = evaluation.evaluate_territory_location(
-        territories_gdf=polygon_gdf
-    )
-    for res in location_results:
-        closest_settlements = [
-            res["closest_settlement"],
-            res["closest_settlement1"],
-            res["closest_settlement2"],
-        ]
-        settlements = [settlement for settlement in closest_settlements if settlement]
-        interpretation = f'{res["interpretation"]}'
-        if settlements:
-            interpretation += (
-                f' (Ближайший населенный пункт: {", ".join(settlements)}).'
-            )
+        polygon_gdf = geometry_gdf(
+            territory_data["geometry"], popframe_region_model.region_model.crs
+        )
 
-        indicator_data = {
-            "indicator_id": 195,
-            "scenario_id": project_scenario_id,
-            "territory_id": None,
-            "hexagon_id": None,
-            "value": float(res["score"]),
-            "comment": interpretation,
-            "information_source": "modeled PopFrame",
-            "properties": {"attribute_name": "Оценка по каркасу расселения"},
-        }
+        # Оценка территории
+        evaluation = popframe_region_model.territory_evaluation
 
-        indicators_response = requests.put(
-            f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}/indicators_values",
-            headers={"Authorization": f"Bearer {token}"},
-            json=indicator_data,
+        # Выполнение первой оценки
+        location_results = await asyncio.to_thread(
+            evaluation.evaluate_territory_location, territories_gdf=polygon_gdf
+        )
+        indicators_data = scenario_indicators_values(
+            195,
+            project_scenario_id,
+            extract_scores(location_results),
+            location_interpretations(location_results),
+            {"attribute_name": "Оценка по каркасу расселения"},
         )
-        if indicators_response.status_code not in (200, 201):
-            logger.exception(
-                f"Error saving indicators (population): {indicators_response.status_code}, "
-                f"Body response: {indicators_response.text}"
-            )
-            raise Exception("Error saving indicators (location)")
-
-    population_results = evaluation.population_criterion(territories_gdf=polygon_gdf)
-    for res in population_results:
-        indicator_data = {
-            "indicator_id": 197,
-            "scenario_id": project_scenario_id,
-            "territory_id": None,
-            "hexagon_id": None,
-            "value": float(res["score"]),
-            "comment": res["interpretation"],
-            "information_source": "modeled PopFrame",
-            "properties": {"attribute_name": "Население"},
-        }
 
-        indicators_response = requests.put(
-            f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}/indicators_values",
-            headers={"Authorization": f"Bearer {token}"},
-            json=indicator_data,
+        population_results = await asyncio.to_thread(
+            evaluation.population_criterion, territories_gdf=polygon_gdf
         )
-        if indicators_response.status_code not in (200, 201):
-            logger.exception(
-                f"Error saving indicators (population):: {indicators_response.status_code}, "
-                f"Body response: {indicators_response.text}"
-            )
-            raise Exception("Error saving indicators (population):")
-        logger.info(
-            f"Saved population indicators values for scenario {project_scenario_id}"
+        indicators_data += scenario_indicators_values(
+            197,
+            project_scenario_id,
+            extract_scores(population_results),
+            [res["interpretation"] for res in population_results],
+            {"attribute_name": "Население"},
         )
+        await urban_api_gateway.put_scenario_indicators_values(
+            project_scenario_id, indicators_data, token, session=session
+        )
+    logger.info(
+        f"Saved population indicators values for scenario {project_scenario_id}"
+    )
 
 
-@popframe_router.put("/save_popframe_evaluation")
+@popframe_router.put("/save_popframe_evaluation", status_code=202)
 async def save_popframe_evaluation_endpoint(
-    background_tasks: BackgroundTasks,
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    region_id: int = Depends(get_region_with_model),
     project_scenario_id: int | None = Query(
         None, description="ID сценария проекта, если имеется"
     ),
     token: str = Depends(verify_bearer_token),
 ):
     # Добавляем фоновую задачу для комбинированной обработки
-    background_tasks.add_task(
-        process_combined_evaluation, popframe_region_model, project_scenario_id, token
+    queued = await task_queue.put(
+        run_with_region_model,
+        process_combined_evaluation,
+        region_id,
+        project_scenario_id,
+        token,
+        key=("popframe_evaluation", region_id, project_scenario_id),
     )
 
+    if not queued:
+        return {
+            "message": "PopFrame evaluation for this scenario is already queued",
+            "status": "queued",
+        }
+
     return {"message": "PopFrame evaluation processing started", "status": "processing"}
@@ -1,10 +1,18 @@
 import asyncio
 
-from fastapi import APIRouter, BackgroundTasks
+from fastapi import APIRouter, BackgroundTasks, Depends
 from loguru import logger
 
+from app.common.models.popframe_models.popframe_models_service import (
+    PopFrameModelsService,
+)
+from app.common.towns.towns_layers import TownsLayers
 from app.common.validators.region_validators import validate_region
-from app.dependencies import pop_frame_model_service, towns_layers
+from app.dependencies import (
+    get_pop_frame_model_service,
+    get_towns_layers,
+    urban_api_gateway,
+)
 
 recalculating = False
 
@@ -12,7 +20,14 @@ model_calculator_router = APIRouter(prefix="/model_calculator")
 
 
 @model_calculator_router.put("/recalculate/all")
-async def recalculate_all_popframe_models(models: bool = True, towns: bool = True):
+async def recalculate_all_popframe_models(
+    models: bool = True,
+    towns: bool = True,
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+    towns_layers: TownsLayers = Depends(get_towns_layers),
+):
     """
     Recalculate all popframe models and towns
 
@@ -23,6 +38,7 @@ async def recalculate_all_popframe_models(models: bool = True, towns: bool = Tru
         - towns: (boolean): weather to recalculate towns. Defaults to True.
     """
 
+    urban_api_gateway.invalidate_fed_city_mo()
     if models:
         asyncio.create_task(pop_frame_model_service.load_and_cache_all_models())
     if towns:
@@ -31,7 +47,15 @@ async def recalculate_all_popframe_models(models: bool = True, towns: bool = Tru
 
 
 @model_calculator_router.put("/recalculate/{region_id}")
-async def recalculate_region(region_id: int, model: bool = True, towns: bool = True):
+async def recalculate_region(
+    region_id: int,
+    model: bool = True,
+    towns: bool = True,
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+    towns_layers: TownsLayers = Depends(get_towns_layers),
+):
     """
     Router recalculates model for region and towns recaching
 
@@ -45,6 +69,7 @@ async def recalculate_region(region_id: int, model: bool = True, towns: bool = T
     """
 
     validate_region(region_id)
+    urban_api_gateway.invalidate_fed_city_mo(region_id)
     if model:
         await pop_frame_model_service.calculate_model(region_id)
     if towns:
@@ -54,7 +79,11 @@ async def recalculate_region(region_id: int, model: bool = True, towns: bool = T
 
 
 @model_calculator_router.get("/available_regions", response_model=list[int])
-async def get_available_regions() -> list[int]:
+async def get_available_regions(
+    pop_frame_model_service: PopFrameModelsService = Depends(
+        get_pop_frame_model_service
+    ),
+) -> list[int]:
     """Router returns calculated and cached models"""
 
     return await pop_frame_model_service.get_available_regions()
@@ -1,18 +1,24 @@
+import asyncio
+
+import aiohttp
 import geopandas as gpd
-import pandas as pd
-import requests
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
-from loguru import logger
+from fastapi import APIRouter, Depends, HTTPException, Query
 from popframe.method.city_evaluation import CityPopulationScorer
-from popframe.method.territory_evaluation import TerritoryEvaluation
 
 from app.common.auth.bearer import verify_bearer_token
+from app.common.geometry.crs import geometry_gdf, reproject
 from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
     PopFrameAPIModel,
 )
+from app.common.models.popframe_models.popframe_scores import (
+    extract_scores,
+    scenario_indicators_values,
+)
 from app.dependencies import (
-    config,
-    pop_frame_model_service,
+    get_popframe_region_model,
+    get_region_with_model,
+    run_with_region_model,
+    task_queue,
     territory_checker,
     urban_api_gateway,
 )
@@ -23,9 +29,7 @@ population_router = APIRouter(prefix="/population", tags=["Population Criterion"
 @population_router.post("/get_population_criterion_score", response_model=list[float])
 async def get_population_criterion_score_endpoint(
     geojson_data: dict,
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    popframe_region_model: PopFrameAPIModel = Depends(get_popframe_region_model),
 ):
     if geojson_data.get("type") != "FeatureCollection":
         raise HTTPException(
@@ -34,7 +38,7 @@ async def get_population_criterion_score_endpoint(
         )
 
     polygon_gdf = gpd.GeoDataFrame.from_features(geojson_data["features"], crs=4326)
-    polygon_gdf = polygon_gdf.to_crs(popframe_region_model.region_model.crs)
+    polygon_gdf = reproject(polygon_gdf, popframe_region_model.region_model.crs)
     if await territory_checker.check_on_federal_city(popframe_region_model.region_id):
         region_mo = await urban_api_gateway.get_mo_for_fed_city_with_population(
             popframe_region_model.region_id
@@ -42,99 +46,69 @@ async def get_population_criterion_score_endpoint(
         if len(polygon_gdf) == 1:
             polygon_gdf["hexagon_id"] = 0
         scorer = CityPopulationScorer(region_mo, polygon_gdf)
-        return pd.DataFrame(scorer.run())["score"].tolist()
+        return extract_scores(await asyncio.to_thread(scorer.run))
     else:
-        evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
-        scores = []
-        result = evaluation.population_criterion(territories_gdf=polygon_gdf)
+        evaluation = popframe_region_model.territory_evaluation
+        result = await asyncio.to_thread(
+            evaluation.population_criterion, territories_gdf=polygon_gdf
+        )
         if result:
-            for res in result:
-                scores.append(float(res["score"]))
-            return scores
+            return extract_scores(result)
 
 
 async def process_population_criterion(
     popframe_region_model: PopFrameAPIModel, project_scenario_id: int, token: str
 ):
 
-    scenario_response = requests.get(
-        f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    if scenario_response.status_code != 200:
-        if scenario_response.status_code == 404:
-            raise HTTPException(404)
-        else:
-            raise Exception(
-                "Непредвиденная ошибка при получении информации по сценарию"
-            )
-
-    scenario_data = scenario_response.json()
-    project_id = scenario_data.get("project", {}).get("project_id")
-    if project_id is None:
-        raise Exception("Project ID is missing in scenario data.")
-
-    territory_response = requests.get(
-        f"{config.get('URBAN_API')}/api/v1/projects/{project_id}/territory",
-        headers={"Authorization": f"Bearer {token}"},
-    )
-    if territory_response.status_code != 200:
-        raise Exception("Ошибка при получении геометрии территории")
-
-    territory_data = territory_response.json()
-    territory_geometry = territory_data["geometry"]
-    territory_feature = {
-        "type": "Feature",
-        "geometry": territory_geometry,
-        "properties": {},
-    }
-    polygon_gdf = gpd.GeoDataFrame.from_features([territory_feature], crs=4326)
-    polygon_gdf = polygon_gdf.to_crs(popframe_region_model.region_model.crs)
-
-    evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
-    result = evaluation.population_criterion(territories_gdf=polygon_gdf)
-
-    for res in result:
-        indicator_data = {
-            "indicator_id": 197,
-            "scenario_id": project_scenario_id,
-            "territory_id": None,
-            "hexagon_id": None,
-            "properties": {},
-            "value": float(res["score"]),
-            "comment": res["interpretation"],
-            "information_source": "modeled PopFrame",
-        }
+    async with aiohttp.ClientSession() as session:
+        territory_data = await urban_api_gateway.get_scenario_territory(
+            project_scenario_id, token, session=session, use_cache=False
+        )
 
-        indicators_response = requests.put(
-            f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}/indicators_values",
-            headers={"Authorization": f"Bearer {token}"},
-            json=indicator_data,
+        polygon_gdf = geometry_gdf(
+            territory_data["geometry"], popframe_region_model.region_model.crs
         )
-        if indicators_response.status_code not in (200, 201):
-            logger.exception(
-                f"Ошибка при сохранении показателей: {indicators_response.status_code}, "
-                f"Тело ответа: {indicators_response.text}"
-            )
-            raise Exception("Ошибка при сохранении показателей")
 
+        evaluation = popframe_region_model.territory_evaluation
+        result = await asyncio.to_thread(
+            evaluation.population_criterion, territories_gdf=polygon_gdf
+        )
+
+        indicators_data = scenario_indicators_values(
+            197,
+            project_scenario_id,
+            extract_scores(result),
+            [res["interpretation"] for res in result],
+        )
+        await urban_api_gateway.put_scenario_indicators_values(
+            project_scenario_id, indicators_data, token, session=session
+        )
 
-@population_router.post("/save_population_criterion")
+
+@population_router.post("/save_population_criterion", status_code=202)
 async def save_population_criterion_endpoint(
-    background_tasks: BackgroundTasks,
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    region_id: int = Depends(get_region_with_model),
     project_scenario_id: int | None = Query(
         None, description="ID сценария проекта, если имеется"
     ),
     token: str = Depends(verify_bearer_token),
 ):
 
-    background_tasks.add_task(
-        process_population_criterion, popframe_region_model, project_scenario_id, token
+    queued = await task_queue.put(
+        run_with_region_model,
+        process_population_criterion,
+        region_id,
+        project_scenario_id,
+        token,
+        key=("population_criterion", region_id, project_scenario_id),
     )
 
+    if not queued:
+        return {
+            "message": "Population criterion for this scenario is already queued",
+            "status": "queued",
+        }
+
     return {
         "message": "Population criterion processing started",
         "status": "processing",
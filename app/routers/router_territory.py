@@ -1,54 +1,79 @@
-import sys
+import asyncio
 
+import aiohttp
 import geopandas as gpd
-import requests
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query
+import shapely
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from loguru import logger
-from popframe.method.territory_evaluation import TerritoryEvaluation
 from pydantic_geojson import PolygonModel
 
 from app.common.auth.bearer import verify_bearer_token
+from app.common.geometry.crs import geometry_gdf, reproject_geometry
 from app.common.models.popframe_models.popframe_dtype.popframe_api_model import (
     PopFrameAPIModel,
 )
-from app.dependencies import config, pop_frame_model_service
+from app.common.models.popframe_models.popframe_scores import (
+    extract_scores,
+    location_interpretations,
+    scenario_indicators_values,
+)
+from app.common.openapi.schemas import inline_json_schema
+from app.dependencies import (
+    get_popframe_region_model,
+    get_region_with_model,
+    run_with_region_model,
+    task_queue,
+    urban_api_gateway,
+)
 from app.models.models import EvaluateTerritoryLocationResult
 
 territory_router = APIRouter(prefix="/territory", tags=["Territory Evaluation"])
 
-logger.remove()
-logger.add(
-    sys.stdout,
-    format="<green>{time:MM-DD HH:mm}</green> | <level>{level: <8}</level> | <cyan>{message}</cyan>",
-    level="INFO",
-    colorize=True,
-)
-
 
 @territory_router.post(
-    "/evaluate_location_test", response_model=list[EvaluateTerritoryLocationResult]
+    "/evaluate_location_test",
+    response_model=list[EvaluateTerritoryLocationResult],
+    # body is parsed with shapely, PolygonModel schema is kept for docs only
+    openapi_extra={
+        "requestBody": {
+            "content": {
+                "application/json": {"schema": inline_json_schema(PolygonModel)}
+            },
+            "required": True,
+        }
+    },
 )
 async def evaluate_territory_location_endpoint(
-    polygon: PolygonModel,
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    request: Request,
+    popframe_region_model: PopFrameAPIModel = Depends(get_popframe_region_model),
     project_scenario_id: int | None = Query(
         None, description="ID сценария проекта, если имеется"
     ),
     token: str = Depends(verify_bearer_token),  # Добавляем токен для аутентификации
 ):
     try:
-        evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
-        polygon_feature = {
-            "type": "Feature",
-            "geometry": polygon.model_dump(),
-            "properties": {},
-        }
-        polygon_gdf = gpd.GeoDataFrame.from_features([polygon_feature], crs=4326)
-        polygon_gdf = polygon_gdf.to_crs(popframe_region_model.region_model.crs)
-        result = evaluation.evaluate_territory_location(territories_gdf=polygon_gdf)
-        return result
+        geometry = shapely.from_geojson(await request.body())
+        geom_type = getattr(geometry, "geom_type", None)
+        if geom_type != "Polygon":
+            raise ValueError(f"Expected Polygon geometry, got {geom_type}")
+    except (shapely.errors.GEOSException, ValueError) as e:
+        # same status as pydantic body validation, which is skipped for performance
+        raise RequestValidationError(
+            [{"type": "value_error", "loc": ("body",), "msg": repr(e), "input": None}]
+        ) from e
+    try:
+        evaluation = popframe_region_model.territory_evaluation
+        region_crs = popframe_region_model.region_model.crs
+        polygon_gdf = gpd.GeoDataFrame(
+            geometry=[reproject_geometry(geometry, 4326, region_crs)], crs=region_crs
+        )
+        result = await asyncio.to_thread(
+            evaluation.evaluate_territory_location, territories_gdf=polygon_gdf
+        )
+        # response_model documents the schema, rows are serialized as is without validation
+        return ORJSONResponse(result)
     except Exception as e:
         raise HTTPException(status_code=400, detail=repr(e))
 
@@ -57,104 +82,60 @@ async def process_evaluation(
     popframe_region_model: PopFrameAPIModel, project_scenario_id: int, token: str
 ):
     try:
-        # Getting project_id and additional information based on scenario_id
-        scenario_response = requests.get(
-            f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        if scenario_response.status_code != 200:
-            raise Exception("Error retrieving scenario information")
-
-        scenario_data = scenario_response.json()
-        project_id = scenario_data.get("project", {}).get("project_id")
-        if project_id is None:
-            raise Exception("Project ID is missing in scenario data.")
-
-        # Retrieving territory geometry
-        territory_response = requests.get(
-            f"{config.get('URBAN_API')}/api/v1/projects/{project_id}/territory",
-            headers={"Authorization": f"Bearer {token}"},
-        )
-        if territory_response.status_code != 200:
-            raise Exception("Error retrieving territory geometry")
-
-        # Extracting only the polygon geometry
-        territory_data = territory_response.json()
-        territory_geometry = territory_data["geometry"]
-
-        # Converting the territory geometry to GeoDataFrame
-        territory_feature = {
-            "type": "Feature",
-            "geometry": territory_geometry,
-            "properties": {},
-        }
-        polygon_gdf = gpd.GeoDataFrame.from_features([territory_feature], crs=4326)
-        polygon_gdf = polygon_gdf.to_crs(popframe_region_model.region_model.crs)
-
-        # Territory evaluation
-        evaluation = TerritoryEvaluation(region=popframe_region_model.region_model)
-        result = evaluation.evaluate_territory_location(territories_gdf=polygon_gdf)
+        async with aiohttp.ClientSession() as session:
+            territory_data = await urban_api_gateway.get_scenario_territory(
+                project_scenario_id, token, session=session, use_cache=False
+            )
 
-        # Saving the evaluation to the database
-        for res in result:
-            closest_settlements = [
-                res["closest_settlement"],
-                res["closest_settlement1"],
-                res["closest_settlement2"],
-            ]
-            settlements = [
-                settlement for settlement in closest_settlements if settlement
-            ]
+            polygon_gdf = geometry_gdf(
+                territory_data["geometry"], popframe_region_model.region_model.crs
+            )
 
-            # Создаем строку интерпретации
-            interpretation = f'{res["interpretation"]}'
-            if settlements:
-                interpretation += (
-                    f' (Ближайший населенный пункт: {", ".join(settlements)}).'
-                )
+            # Territory evaluation
+            evaluation = popframe_region_model.territory_evaluation
+            result = await asyncio.to_thread(
+                evaluation.evaluate_territory_location, territories_gdf=polygon_gdf
+            )
 
-            indicator_data = {
-                "indicator_id": 195,
-                "scenario_id": project_scenario_id,
-                "territory_id": None,
-                "hexagon_id": None,
-                "value": float(res["score"]),
-                "comment": interpretation,
-                "information_source": "modeled PopFrame",
-                "properties": {},
-            }
+            indicators_data = scenario_indicators_values(
+                195,
+                project_scenario_id,
+                extract_scores(result),
+                location_interpretations(result),
+            )
 
-            indicators_response = requests.put(
-                f"{config.get('URBAN_API')}/api/v1/scenarios/{project_scenario_id}/indicators_values",
-                headers={"Authorization": f"Bearer {token}"},
-                json=indicator_data,
+            # Saving the evaluation to the database
+            await urban_api_gateway.put_scenario_indicators_values(
+                project_scenario_id, indicators_data, token, session=session
             )
-            if indicators_response.status_code not in (200, 201):
-                logger.exception(
-                    f"Error saving indicators: {indicators_response.status_code}, "
-                    f"Response body: {indicators_response.text}"
-                )
-                raise Exception("Error saving indicators")
     except Exception as e:
         logger.exception(f"Error during saving indicators {repr(e)}")
 
 
-@territory_router.post("/save_evaluate_location")
+@territory_router.post("/save_evaluate_location", status_code=202)
 async def save_evaluate_location_endpoint(
-    background_tasks: BackgroundTasks,
-    popframe_region_model: PopFrameAPIModel = Depends(
-        pop_frame_model_service.get_model
-    ),
+    region_id: int = Depends(get_region_with_model),
     project_scenario_id: int | None = Query(
         None, description="Project scenario ID, if available"
     ),
     token: str = Depends(verify_bearer_token),  # Добавляем токен для аутентификации
 ):
     # Добавляем фоновую задачу
-    background_tasks.add_task(
-        process_evaluation, popframe_region_model, project_scenario_id, token
+    queued = await task_queue.put(
+        run_with_region_model,
+        process_evaluation,
+        region_id,
+        project_scenario_id,
+        token,
+        key=("evaluate_location", region_id, project_scenario_id),
     )
 
+    if not queued:
+        return {
+            "message": "Territory evaluation for this scenario is already queued",
+            "status": "queued",
+        }
+
     return {
         "message": "Population criterion processing started",
         "status": "processing",
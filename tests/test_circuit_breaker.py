@@ -0,0 +1,138 @@
+import asyncio
+
+import aiohttp
+import pytest
+from aiohttp import RequestInfo
+from fastapi import HTTPException
+from yarl import URL
+
+from app.common.api_handler.circuit_breaker import CircuitBreaker
+from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.gateways.urban_api_gateway import UrbanAPIGateway
+
+
+def open_breaker(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.fail_max):
+        breaker.check()
+        breaker.record_failure()
+
+
+def test_breaker_opens_after_fail_max_failures():
+    breaker = CircuitBreaker("test", fail_max=3, reset_timeout=60)
+    for _ in range(2):
+        breaker.record_failure()
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(HTTPException) as e:
+        breaker.check()
+    assert e.value.status_code == 503
+
+
+def test_breaker_success_resets_failures():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=60)
+    breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.check()
+
+
+def test_half_open_lets_single_trial_through():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    with pytest.raises(HTTPException):
+        breaker.check()
+    breaker._opened_at -= 0.05
+    breaker.check()
+    with pytest.raises(HTTPException) as e:
+        breaker.check()
+    assert e.value.status_code == 503
+
+
+def test_half_open_trial_success_closes_circuit():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    breaker._opened_at -= 0.05
+    breaker.check()
+    breaker.record_success()
+    breaker.check()
+    breaker.check()
+
+
+def test_half_open_trial_failure_opens_circuit_again():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    breaker._opened_at -= 0.05
+    breaker.check()
+    breaker.record_failure()
+    with pytest.raises(HTTPException):
+        breaker.check()
+
+
+def test_half_open_unrecorded_trial_is_replaced_after_timeout():
+    breaker = CircuitBreaker("test", fail_max=2, reset_timeout=0.05)
+    open_breaker(breaker)
+    breaker._opened_at -= 0.05
+    breaker.check()
+    breaker._trial_started_at -= 0.05
+    breaker.check()
+
+
+class FakeAPIHandler:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    async def put(self, endpoint_url, headers=None, data=None, session=None):
+        self.calls += 1
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+def test_indicator_upload_retries_5xx():
+    api_handler = FakeAPIHandler(
+        http_exception(502, "bad gateway", None, None),
+        http_exception(503, "unavailable", None, None),
+        {"value": 1},
+    )
+    gateway = UrbanAPIGateway(api_handler, indicators_put_max_backoff=0)
+    result = asyncio.run(gateway.put_scenario_indicator_value(1, {"value": 1}))
+    assert result == {"value": 1}
+    assert api_handler.calls == 3
+
+
+def test_indicator_upload_raises_after_last_attempt():
+    api_handler = FakeAPIHandler(
+        *[http_exception(502, "bad gateway", None, None) for _ in range(2)]
+    )
+    gateway = UrbanAPIGateway(
+        api_handler, indicators_put_attempts=2, indicators_put_max_backoff=0
+    )
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(gateway.put_scenario_indicator_value(1, {"value": 1}))
+    assert e.value.status_code == 502
+    assert api_handler.calls == 2
+
+
+def test_indicator_upload_does_not_retry_4xx():
+    api_handler = FakeAPIHandler(
+        http_exception(400, "bad request", None, None), {"value": 1}
+    )
+    gateway = UrbanAPIGateway(api_handler, indicators_put_max_backoff=0)
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(gateway.put_scenario_indicator_value(1, {"value": 1}))
+    assert e.value.status_code == 400
+    assert api_handler.calls == 1
+
+
+def test_indicator_upload_does_not_retry_non_json_4xx():
+    error = aiohttp.ContentTypeError(
+        RequestInfo(URL("http://urban"), "PUT", {}), (), status=400
+    )
+    api_handler = FakeAPIHandler(error, {"value": 1})
+    gateway = UrbanAPIGateway(api_handler, indicators_put_max_backoff=0)
+    with pytest.raises(aiohttp.ContentTypeError):
+        asyncio.run(gateway.put_scenario_indicator_value(1, {"value": 1}))
+    assert api_handler.calls == 1
+    assert gateway.indicators_breaker._failures == 0
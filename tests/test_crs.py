@@ -0,0 +1,25 @@
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from app.common.geometry.crs import reproject_geometry
+
+
+def test_reproject_geometry_matches_to_crs():
+    geometries = np.array(
+        [
+            shapely.Polygon([(30, 59), (31, 59), (31, 60), (30, 59)]),
+            shapely.Point(30, 60, 5),
+        ]
+    )
+    expected = gpd.GeoSeries(geometries, crs=4326).to_crs(32636).values
+    result = reproject_geometry(geometries, 4326, 32636)
+    assert shapely.has_z(result).tolist() == [False, True]
+    assert shapely.equals_exact(result, np.asarray(expected), tolerance=1e-6).all()
+    assert shapely.get_coordinates(result[1], include_z=True)[0, 2] == 5
+
+
+def test_reproject_single_geometry_keeps_z():
+    result = reproject_geometry(shapely.Point(30, 60, 5), 4326, 3857)
+    assert result.has_z
+    assert result.z == 5
@@ -0,0 +1,35 @@
+import json
+
+import geopandas as gpd
+import numpy as np
+import shapely
+
+from app.common.geometry.geojson import geojson_bytes, iter_feature_collections
+
+
+def towns_gdf() -> gpd.GeoDataFrame:
+    return gpd.GeoDataFrame(
+        {
+            "name": ["A", "B"],
+            "parent": [{"id": 1, "name": "P"}, {"id": 2, "name": "Q"}],
+            "level": [1, np.nan],
+            "population": np.array([100, 200], dtype="int64"),
+        },
+        geometry=[shapely.Point(30, 60), None],
+        crs=4326,
+        index=[5, 7],
+    )
+
+
+def test_geojson_bytes_matches_to_json():
+    gdf = towns_gdf()
+    assert json.loads(geojson_bytes(gdf)) == json.loads(gdf.to_json())
+
+
+def test_feature_collections_match_to_json():
+    gdf = towns_gdf()
+    content = b"".join(iter_feature_collections({"first": gdf, "second": gdf[:0]}))
+    assert json.loads(content) == {
+        "first": json.loads(gdf.to_json()),
+        "second": json.loads(gdf[:0].to_json()),
+    }
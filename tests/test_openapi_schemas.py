@@ -0,0 +1,13 @@
+import json
+
+from pydantic_geojson import PolygonModel
+
+from app.common.openapi.schemas import inline_json_schema
+
+
+def test_inline_json_schema_has_no_refs():
+    schema = inline_json_schema(PolygonModel)
+    assert "$defs" not in schema
+    assert "$ref" not in json.dumps(schema)
+    coordinates = schema["properties"]["coordinates"]["items"]["items"]
+    assert coordinates == PolygonModel.model_json_schema()["$defs"]["Coordinates"]
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from app.common.tasks.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_run():
+    async def main():
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return "result"
+
+        results = await asyncio.gather(
+            *[single_flight.run("key", work) for _ in range(5)]
+        )
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert results == ["result"] * 5
+    assert calls == [1]
+
+
+def test_different_keys_run_separately():
+    async def main():
+        single_flight = SingleFlight()
+
+        async def work(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        return await asyncio.gather(
+            single_flight.run(1, lambda: work(1)),
+            single_flight.run(2, lambda: work(2)),
+        )
+
+    assert asyncio.run(main()) == [1, 2]
+
+
+def test_exception_propagates_to_every_caller():
+    async def main():
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise ValueError("failed")
+
+        results = await asyncio.gather(
+            *[single_flight.run("key", work) for _ in range(3)],
+            return_exceptions=True,
+        )
+        return results, calls
+
+    results, calls = asyncio.run(main())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
+    assert calls == [1]
+
+
+def test_finished_call_is_not_reused():
+    async def main():
+        single_flight = SingleFlight()
+        calls = []
+
+        async def work():
+            calls.append(1)
+            return len(calls)
+
+        first = await single_flight.run("key", work)
+        second = await single_flight.run("key", work)
+        return first, second
+
+    assert asyncio.run(main()) == (1, 2)
+
+
+def test_cancelled_caller_does_not_cancel_shared_run():
+    async def main():
+        single_flight = SingleFlight()
+
+        async def work():
+            await asyncio.sleep(0.02)
+            return "result"
+
+        cancelled = asyncio.create_task(single_flight.run("key", work))
+        waiting = asyncio.create_task(single_flight.run("key", work))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        return await waiting
+
+    assert asyncio.run(main()) == "result"
@@ -0,0 +1,65 @@
+import asyncio
+
+from app.common.tasks.task_queue import TaskQueue
+
+
+def test_put_deduplicates_waiting_jobs():
+    async def main():
+        queue = TaskQueue(workers_count=1)
+        calls = []
+
+        async def job(value):
+            calls.append(value)
+
+        assert await queue.put(job, 1, key="job")
+        assert not await queue.put(job, 2, key="job")
+        assert await queue.put(job, 3, key="other")
+        assert await queue.put(job, 4)
+        await queue.start()
+        await queue._queue.join()
+        await queue.stop()
+        return calls
+
+    assert asyncio.run(main()) == [1, 3, 4]
+
+
+def test_key_is_released_when_job_starts():
+    async def main():
+        queue = TaskQueue(workers_count=1)
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def job():
+            started.set()
+            await release.wait()
+
+        await queue.start()
+        assert await queue.put(job, key="job")
+        await started.wait()
+        assert await queue.put(job, key="job")
+        assert not await queue.put(job, key="job")
+        release.set()
+        await queue._queue.join()
+        await queue.stop()
+
+    asyncio.run(main())
+
+
+def test_key_is_released_after_job_fails():
+    async def main():
+        queue = TaskQueue(workers_count=1)
+        calls = []
+
+        async def job():
+            calls.append(1)
+            raise ValueError("failed")
+
+        await queue.start()
+        assert await queue.put(job, key="job")
+        await queue._queue.join()
+        assert await queue.put(job, key="job")
+        await queue._queue.join()
+        await queue.stop()
+        return calls
+
+    assert asyncio.run(main()) == [1, 1]
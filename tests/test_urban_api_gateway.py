@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.common.exceptions.http_exception_wrapper import http_exception
+from app.common.gateways.urban_api_gateway import UrbanAPIGateway
+
+
+class FakeAPIHandler:
+    def __init__(self, post_responses, put_responses=()):
+        self.responses = {"post": list(post_responses), "put": list(put_responses)}
+        self.calls = {"post": 0, "put": 0}
+
+    def _respond(self, method, data):
+        self.calls[method] += 1
+        response = self.responses[method].pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return data if response is None else response
+
+    async def post(self, endpoint_url, headers=None, data=None, session=None):
+        return self._respond("post", data)
+
+    async def put(self, endpoint_url, headers=None, data=None, session=None):
+        return self._respond("put", data)
+
+
+def api_error(status_code, detail=None):
+    return http_exception(status_code, "error", "url", {"detail": detail})
+
+
+VALUES = [{"indicator_id": 195, "value": 1}, {"indicator_id": 197, "value": 2}]
+
+
+def upload(gateway):
+    return asyncio.run(gateway.put_scenario_indicators_values(1, VALUES))
+
+
+def test_bulk_upload_sends_one_request():
+    api_handler = FakeAPIHandler([None])
+    gateway = UrbanAPIGateway(api_handler, bulk_indicators_upload=True)
+    assert upload(gateway) == VALUES
+    assert api_handler.calls == {"post": 1, "put": 0}
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        api_error(405, "Method Not Allowed"),
+        api_error(422, [{"type": "dict_type", "loc": ["body"], "msg": "dict"}]),
+    ],
+)
+def test_unsupported_bulk_endpoint_falls_back_to_per_value_upload(error):
+    api_handler = FakeAPIHandler([error], [None, None, None, None])
+    gateway = UrbanAPIGateway(api_handler, bulk_indicators_upload=True)
+    assert upload(gateway) == VALUES
+    assert upload(gateway) == VALUES
+    assert api_handler.calls == {"post": 1, "put": 4}
+    assert gateway.bulk_indicators_upload
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        api_error(404, "Scenario not found"),
+        api_error(400, "Bad request"),
+        api_error(422, [{"loc": ["body", 0, "value"], "msg": "float"}]),
+    ],
+)
+def test_scenario_errors_propagate_and_keep_bulk_upload(error):
+    api_handler = FakeAPIHandler([error, None])
+    gateway = UrbanAPIGateway(api_handler, bulk_indicators_upload=True)
+    with pytest.raises(HTTPException) as e:
+        upload(gateway)
+    assert e.value.status_code == error.status_code
+    assert upload(gateway) == VALUES
+    assert api_handler.calls == {"post": 2, "put": 0}